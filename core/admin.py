@@ -1,7 +1,8 @@
 # core/admin.py - Make sure it looks like this
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Event, SessionalMark, Notification  # No Department!
+from .forms import EventAdminForm
+from .models import User, Event, SessionalMark, Notification, NotificationDelivery, RankSnapshot, RosterImport  # No Department!
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -13,6 +14,7 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
+    form = EventAdminForm
     list_display = ('title', 'event_type', 'date', 'created_by', 'max_marks')
     list_filter = ('event_type', 'date', 'created_by')
     search_fields = ('title', 'description', 'venue')
@@ -27,8 +29,27 @@ class SessionalMarkAdmin(admin.ModelAdmin):
     def percentage(self, obj):
         return f"{obj.percentage():.2f}%"
 
+@admin.register(RankSnapshot)
+class RankSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('student', 'department', 'event_type', 'rank', 'cohort_size', 'score', 'percentile', 'computed_at')
+    list_filter = ('department', 'event_type')
+    search_fields = ('student__username',)
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_by', 'created_at', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('title', 'message')
+
+@admin.register(NotificationDelivery)
+class NotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('notification', 'recipient', 'channel', 'status', 'attempts', 'sent_at')
+    list_filter = ('status', 'channel')
+    search_fields = ('recipient__username', 'notification__title')
+    raw_id_fields = ('notification', 'recipient')
+
+@admin.register(RosterImport)
+class RosterImportAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'uploaded_by', 'status', 'total_rows', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    exclude = ('roster',)
@@ -0,0 +1,110 @@
+# core/archive.py
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import User, Event, SessionalMark
+from .ranking import schedule_refresh
+from .routers import PRIMARY, ARCHIVE
+
+BATCH_SIZE = 200
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _copy_users(user_ids):
+    # Archive users only exist as foreign-key targets, so they cannot log in
+    already = set(User.objects.using(ARCHIVE).filter(pk__in=user_ids).values_list('pk', flat=True))
+    users = list(User.objects.using(PRIMARY).filter(pk__in=set(user_ids) - already))
+    taken = set(
+        User.objects.using(ARCHIVE).filter(username__in=[user.username for user in users])
+        .values_list('username', flat=True)
+    )
+    unusable = make_password(None)
+    for user in users:
+        if user.username in taken:
+            # An archived account was deleted and its username reused
+            user.username = f'{user.username[:130]}#{user.pk}'
+        user.password = unusable
+        user.is_staff = user.is_superuser = False
+    User.objects.using(ARCHIVE).bulk_create(users)
+
+
+def _copy(model, objs, timestamp_fields):
+    # bulk_create re-stamps auto_now/auto_now_add fields; put the originals back
+    originals = [[getattr(obj, field) for field in timestamp_fields] for obj in objs]
+    model.objects.using(ARCHIVE).bulk_create(objs)
+    for obj, values in zip(objs, originals):
+        for field, value in zip(timestamp_fields, values):
+            setattr(obj, field, value)
+    model.objects.using(ARCHIVE).bulk_update(objs, fields=timestamp_fields)
+
+
+def _row_ids(db, event_ids):
+    Assignment = Event.assigned_students.through
+    return (
+        set(Event.objects.using(db).filter(pk__in=event_ids).values_list('pk', flat=True)),
+        set(Assignment.objects.using(db).filter(event_id__in=event_ids).values_list('pk', flat=True)),
+        set(SessionalMark.objects.using(db).filter(event_id__in=event_ids).values_list('pk', flat=True)),
+    )
+
+
+def archive_events_before(cutoff, batch_size=BATCH_SIZE):
+    """Move events dated before ``cutoff`` and their marks to the archive DB.
+
+    Works in batches of events. A batch is deleted from the primary only
+    after its archive copy has committed (SQLite checks foreign keys at
+    commit) and holds exactly the rows read, so a failure leaves it on the
+    primary. A copy left behind by an interrupted run is replaced.
+    Returns (events, marks) moved.
+    """
+    moved_events = moved_marks = 0
+    departments = set()
+    Assignment = Event.assigned_students.through
+    try:
+        while True:
+            events = list(Event.objects.using(PRIMARY).filter(date__lt=cutoff).order_by('pk')[:batch_size])
+            if not events:
+                break
+            event_ids = [event.pk for event in events]
+            marks = list(SessionalMark.objects.using(PRIMARY).filter(event_id__in=event_ids))
+            assignments = list(Assignment.objects.using(PRIMARY).filter(event_id__in=event_ids))
+            expected = (set(event_ids), {row.pk for row in assignments}, {mark.pk for mark in marks})
+
+            user_ids = {event.created_by_id for event in events}
+            user_ids.update(assignment.user_id for assignment in assignments)
+            for mark in marks:
+                user_ids.update([mark.student_id, mark.entered_by_id])
+            batch_departments = set(
+                User.objects.using(PRIMARY).filter(pk__in={mark.student_id for mark in marks})
+                .values_list('department', flat=True).distinct()
+            )
+
+            with transaction.atomic(using=ARCHIVE):
+                Event.objects.using(ARCHIVE).filter(pk__in=event_ids).delete()
+                _copy_users(user_ids)
+                _copy(Event, events, ['created_at', 'updated_at'])
+                Assignment.objects.using(ARCHIVE).bulk_create(assignments)
+                _copy(SessionalMark, marks, ['entered_at', 'updated_at'])
+                if _row_ids(ARCHIVE, event_ids) != expected:
+                    raise ArchiveError(f'Archive copy of events {event_ids[0]}-{event_ids[-1]} is incomplete')
+
+            with transaction.atomic(using=PRIMARY):
+                if _row_ids(PRIMARY, event_ids) != expected:
+                    # Marks were entered or removed meanwhile; the next run copies them again
+                    raise ArchiveError(f'Events {event_ids[0]}-{event_ids[-1]} changed while archiving; run again')
+                Event.objects.using(PRIMARY).filter(pk__in=event_ids).delete()
+
+            departments.update(batch_departments)
+            moved_events += len(events)
+            moved_marks += len(marks)
+    finally:
+        if departments:
+            # Archived marks no longer count towards current ranks
+            schedule_refresh(*departments)
+    return moved_events, moved_marks
+
+
+def archived_marks(student):
+    return SessionalMark.objects.using(ARCHIVE).filter(student_id=student.pk).select_related('event')
@@ -1,7 +1,12 @@
 # core/forms.py
 from django import forms
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from .lookups import LOOKUPS
 from .models import User, Event, SessionalMark, Notification
+from .scheduling import find_conflicts
 
 
 class UserRegisterForm(UserCreationForm):
@@ -19,14 +24,72 @@ class UserRegisterForm(UserCreationForm):
         for field in self.fields:
             self.fields[field].widget.attrs.update({'class': 'form-control'})
 
+def timetable_errors(instance, cleaned_data):
+    """Venue and student clashes for the submitted event values."""
+    candidate = Event(
+        pk=instance.pk,
+        date=cleaned_data.get('date'),
+        time=cleaned_data.get('time'),
+        duration_minutes=cleaned_data.get('duration_minutes') or 0,
+        venue=cleaned_data.get('venue', ''),
+    )
+    return find_conflicts(candidate, cleaned_data.get('assigned_students') or ())
+
+class LookupWidget(forms.HiddenInput):
+    """Hidden id plus a search box filled from the mark_lookup endpoint.
+
+    Replaces a <select> with one <option> per student or event; only the
+    selected row's label is rendered, from the in-memory lookup.
+    """
+
+    def __init__(self, kind, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+
+    def render(self, name, value, attrs=None, renderer=None):
+        hidden = super().render(name, value, attrs, renderer)
+        label = LOOKUPS[self.kind].label_for(value) if value else ''
+        return format_html(
+            '<div class="lookup position-relative" data-url="{}">{}'
+            '<input type="search" class="form-control lookup-search" value="{}" placeholder="Type to search" autocomplete="off">'
+            '<div class="list-group position-absolute w-100 lookup-results"></div></div>',
+            reverse('mark_lookup', args=[self.kind]), hidden, label,
+        )
+
+class LookupMultipleWidget(forms.MultipleHiddenInput):
+    """Like LookupWidget, but picks several rows; each shows as a removable badge."""
+
+    def __init__(self, kind, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+
+    def render(self, name, value, attrs=None, renderer=None):
+        chips = format_html_join(
+            '',
+            '<span class="badge bg-secondary me-1 lookup-chip">{}'
+            '<input type="hidden" name="{}" value="{}"> <a href="#" class="text-white lookup-remove">&times;</a></span>',
+            ((LOOKUPS[self.kind].label_for(pk), name, pk) for pk in self.format_value(value)),
+        )
+        return format_html(
+            '<div class="lookup position-relative" data-url="{}" data-name="{}">'
+            '<div class="lookup-chips mb-1">{}</div>'
+            '<input type="search" class="form-control lookup-search" placeholder="Type to add" autocomplete="off">'
+            '<div class="list-group position-absolute w-100 lookup-results"></div></div>',
+            reverse('mark_lookup', args=[self.kind]), name, chips,
+        )
+
 class EventForm(forms.ModelForm):
     class Meta:
         model = Event
-        fields = ['title', 'event_type', 'date', 'time', 'venue', 'description', 'max_marks']
+        fields = ['title', 'event_type', 'date', 'time', 'duration_minutes', 'venue', 'description', 'max_marks', 'assigned_students']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'time': forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}),
             'description': forms.Textarea(attrs={'rows': 4, 'class': 'form-control'}),
+            'assigned_students': LookupMultipleWidget('student'),
+        }
+        help_texts = {
+            'assigned_students': 'Leave empty to open the event to every student.',
         }
         
     def __init__(self, *args, **kwargs):
@@ -35,15 +98,44 @@ class EventForm(forms.ModelForm):
             if 'class' not in self.fields[field].widget.attrs:
                 self.fields[field].widget.attrs.update({'class': 'form-control'})
 
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        # Check the edited values and assignments against the timetable before saving
+        conflicts = timetable_errors(self.instance, cleaned_data)
+        if conflicts:
+            raise forms.ValidationError(conflicts)
+        return cleaned_data
+
+class EventAdminForm(forms.ModelForm):
+    # The admin edits assignments too, so it runs the same timetable check
+    class Meta:
+        model = Event
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.errors:
+            conflicts = timetable_errors(self.instance, cleaned_data)
+            if conflicts:
+                raise forms.ValidationError(conflicts)
+        return cleaned_data
+
 class MarkEntryForm(forms.ModelForm):
     class Meta:
         model = SessionalMark
         fields = ['student', 'event', 'marks_obtained', 'remarks']
+        widgets = {
+            'student': LookupWidget('student'),
+            'event': LookupWidget('event'),
+        }
         
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Only used to validate the submitted id; the widget never lists it
         self.fields['student'].queryset = User.objects.filter(role='student')
-        for field in self.fields:
+        for field in ['marks_obtained', 'remarks']:
             self.fields[field].widget.attrs.update({'class': 'form-control'})
     
     def clean_marks_obtained(self):
@@ -81,18 +173,20 @@ class SearchForm(forms.Form):
     query = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Search...'}))
 
 
-# core/forms.py - Update NotificationForm
+class RosterUploadForm(forms.Form):
+    roster = forms.FileField(help_text='CSV with an enrollment_no column', widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'}))
+    reset_passwords = forms.BooleanField(required=False, label='Also reset passwords of existing users', widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
 
-class NotificationForm(forms.ModelForm):
-    class Meta:
-        model = Notification
-        fields = ['title', 'message', 'target_role', 'is_active']
-        widgets = {
-            'message': forms.Textarea(attrs={'rows': 4, 'class': 'form-control'}),
-        }
-        
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field in self.fields:
-            if field != 'is_active':
-                self.fields[field].widget.attrs.update({'class': 'form-control'})
+    def clean_roster(self):
+        roster = self.cleaned_data['roster']
+        limit = getattr(settings, 'ROSTER_UPLOAD_MAX_BYTES', 2 * 1024 * 1024)
+        if roster.size > limit:
+            raise forms.ValidationError(
+                f'Rosters over {limit // 1024} KB must be imported with "manage.py provision_users".'
+            )
+        try:
+            # Kept as text on the queued import
+            roster.text = roster.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise forms.ValidationError('The roster must be a UTF-8 encoded CSV file.')
+        return roster
@@ -0,0 +1,74 @@
+# core/ical.py
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .scheduling import event_interval
+
+ICAL_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _ical_escape(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _vevent(event, host):
+    if event.time is not None:
+        start, end = event_interval(event)
+        dtstart = f'DTSTART:{start:%Y%m%dT%H%M%S}'
+        dtend = f'DTEND:{end:%Y%m%dT%H%M%S}'
+    else:
+        dtstart = f'DTSTART;VALUE=DATE:{event.date:%Y%m%d}'
+        dtend = f'DTEND;VALUE=DATE:{event.date + timedelta(days=1):%Y%m%d}'
+    stamp = event.updated_at.astimezone(dt_timezone.utc) if event.updated_at else timezone.now()
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{host}',
+        f'DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}',
+        dtstart,
+        dtend,
+        f'SUMMARY:{_ical_escape(event.title)}',
+        f'CATEGORIES:{event.get_event_type_display()}',
+    ]
+    if event.venue:
+        lines.append(f'LOCATION:{_ical_escape(event.venue)}')
+    if event.description:
+        lines.append(f'DESCRIPTION:{_ical_escape(event.description)}')
+    lines.append('END:VEVENT')
+    return '\r\n'.join(lines)
+
+
+def build_ical(events, host, name='Sessional System'):
+    """Render a VCALENDAR, reusing cached VEVENT blocks for unchanged events.
+
+    Each block is keyed on the event's ``updated_at``, so regenerating a
+    student's feed only re-renders the events that were edited since the
+    last request.
+    """
+    events = list(events)
+    keys = {
+        event.pk: f'core:vevent:{event.pk}:{event.updated_at.timestamp() if event.updated_at else 0}'
+        for event in events
+    }
+    cached = cache.get_many(list(keys.values()))
+    missing = {}
+    blocks = []
+    for event in events:
+        block = cached.get(keys[event.pk])
+        if block is None:
+            block = _vevent(event, host)
+            missing[keys[event.pk]] = block
+        blocks.append(block)
+    if missing:
+        cache.set_many(missing, ICAL_CACHE_TIMEOUT)
+
+    head = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Sessional System//Calendar//EN',
+        f'X-WR-CALNAME:{_ical_escape(name)}',
+    ]
+    return '\r\n'.join(head + blocks + ['END:VCALENDAR']) + '\r\n'
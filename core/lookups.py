@@ -0,0 +1,135 @@
+# core/lookups.py
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User, Event
+from .routers import PRIMARY
+
+
+class Snapshot:
+    """Column-wise copy of a table: ids in an int64 array, one tuple per column."""
+
+    __slots__ = ('version', 'loaded_at', 'ids', 'columns', '_keys')
+
+    def __init__(self, version, rows, search_columns):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        rows = sorted(rows)
+        self.ids = array('q', (row[0] for row in rows))
+        self.columns = tuple(tuple(column) for column in zip(*(row[1:] for row in rows))) if rows else ()
+        self._keys = tuple(
+            ' '.join((row[1 + i] or '') for i in search_columns).lower() for row in rows
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, pk):
+        pos = bisect_left(self.ids, pk)
+        if pos < len(self.ids) and self.ids[pos] == pk:
+            return (pk,) + tuple(column[pos] for column in self.columns)
+        return None
+
+    def search(self, query, limit=20):
+        query = query.strip().lower()
+        matches = []
+        for pos, key in enumerate(self._keys):
+            if query in key:
+                matches.append((self.ids[pos],) + tuple(column[pos] for column in self.columns))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+class LookupCache:
+    """Process-local table snapshot, reloaded when its version changes.
+
+    The version lives in the default cache and is bumped by signals in
+    core.signals; LOOKUP_CACHE_TTL bounds staleness when the cache is not
+    shared between workers.
+    """
+
+    def __init__(self, name, queryset, fields, search_fields, label):
+        self.version_key = f'core:lookup:{name}:version'
+        self.queryset = queryset
+        self.fields = fields
+        self.search_columns = [fields.index(field) for field in search_fields]
+        self.label = label
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Start a new epoch so a restarted cache never reuses an old number
+            cache.add(self.version_key, int(time.time() * 1000), None)
+            version = cache.get(self.version_key, 0)
+        return version
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, int(time.time() * 1000), None)
+        self._snapshot = None
+
+    def _stale(self, snapshot, version):
+        ttl = getattr(settings, 'LOOKUP_CACHE_TTL', 300)
+        return snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > ttl
+
+    def snapshot(self):
+        version = self._version()
+        snapshot = self._snapshot
+        if self._stale(snapshot, version):
+            with self._lock:
+                snapshot = self._snapshot
+                if self._stale(snapshot, version):
+                    # A lagging replica would be cached under the new version
+                    rows = self.queryset().using(PRIMARY).order_by().values_list('pk', *self.fields)
+                    snapshot = self._snapshot = Snapshot(version, rows, self.search_columns)
+        return snapshot
+
+    def label_for(self, pk):
+        try:
+            row = self.snapshot().row(int(pk))
+        except (TypeError, ValueError):
+            return ''
+        return self.label(row) if row else ''
+
+    def search(self, query, limit=20):
+        return [{'id': row[0], 'text': self.label(row)} for row in self.snapshot().search(query, limit)]
+
+
+def _student_label(row):
+    _, username, enrollment_no, department = row
+    label = f'{username} ({enrollment_no})' if enrollment_no else username
+    return f'{label} - {department}' if department else label
+
+
+def _event_label(row):
+    _, title, date = row
+    return f'{title} - {date}'
+
+
+students = LookupCache(
+    'students',
+    lambda: User.objects.filter(role='student'),
+    fields=['username', 'enrollment_no', 'department'],
+    search_fields=['username', 'enrollment_no'],
+    label=_student_label,
+)
+
+events = LookupCache(
+    'events',
+    lambda: Event.objects.all(),
+    fields=['title', 'date'],
+    search_fields=['title'],
+    label=_event_label,
+)
+
+LOOKUPS = {'student': students, 'event': events}
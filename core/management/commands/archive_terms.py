@@ -0,0 +1,30 @@
+# core/management/commands/archive_terms.py
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import BATCH_SIZE, ArchiveError, archive_events_before
+from core.routers import ARCHIVE
+
+
+class Command(BaseCommand):
+    help = 'Move events dated before --before, with their marks, to the archive database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help='Cutoff date (YYYY-MM-DD); earlier events are archived')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            cutoff = date.fromisoformat(options['before'])
+        except ValueError:
+            raise CommandError('--before must be a date in YYYY-MM-DD format')
+
+        # Create or update the archive schema before copying into it
+        call_command('migrate', database=ARCHIVE, verbosity=0)
+        try:
+            events, marks = archive_events_before(cutoff, batch_size=options['batch_size'])
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Archived {events} events and {marks} marks dated before {cutoff}'))
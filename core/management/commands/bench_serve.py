@@ -0,0 +1,101 @@
+# core/management/commands/bench_serve.py
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Measure requests/sec of "manage.py serve" at several worker counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='Worker counts to test (default: 1 4 8)')
+        parser.add_argument('--path', default='/health/', help='URL path to request (default: /health/)')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent keep-alive clients')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run each measurement')
+        parser.add_argument('--output', default=None, help='Append JSON results to this file')
+
+    def handle(self, *args, **options):
+        results = []
+        for workers in options['workers']:
+            server = self._start_server(workers, options['port'])
+            try:
+                rps, errors = self._measure(options)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=60)
+            result = {
+                'workers': workers,
+                'path': options['path'],
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'requests_per_sec': round(rps, 1),
+                'errors': errors,
+            }
+            results.append(result)
+            self.stdout.write(f"{workers:>3} worker(s): {rps:10.1f} req/s  ({errors} errors)")
+
+        if options['output']:
+            with open(options['output'], 'a') as fh:
+                for result in results:
+                    fh.write(json.dumps(result) + '\n')
+
+    def _start_server(self, workers, port):
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+        server = subprocess.Popen(
+            [sys.executable, manage_py, 'serve', '--workers', str(workers), '--bind', f'127.0.0.1:{port}'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            # Measure with production settings; serve refuses to start under DEBUG
+            env={**os.environ, 'DJANGO_DEBUG': '0', 'DJANGO_ALLOWED_HOSTS': '127.0.0.1'},
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('Server exited during startup; is gunicorn installed?')
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                conn.request('GET', '/health/')
+                if conn.getresponse().status == 200:
+                    conn.close()
+                    return server
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError(f'Server with {workers} worker(s) did not become healthy')
+
+    def _measure(self, options):
+        deadline = time.monotonic() + options['duration']
+
+        def client():
+            done = errors = 0
+            conn = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=10)
+            while time.monotonic() < deadline:
+                try:
+                    conn.request('GET', options['path'])
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status < 500:
+                        done += 1
+                    else:
+                        errors += 1
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=10)
+            conn.close()
+            return done, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            counts = list(pool.map(lambda _: client(), range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+        return sum(c[0] for c in counts) / elapsed, sum(c[1] for c in counts)
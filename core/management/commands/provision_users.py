@@ -0,0 +1,59 @@
+# core/management/commands/provision_users.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import RosterImport
+from core.provisioning import BATCH_SIZE, RosterImporter, claim_next_job, run_import
+
+
+class Command(BaseCommand):
+    help = (
+        'Create or update users from a roster CSV, matched on enrollment_no. '
+        'Columns: enrollment_no (required), username, email, first_name, last_name, '
+        'role, department, phone, password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('roster', nargs='?', help='Path to the roster CSV')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--processes', type=int, default=None, help='Password hashing processes (default: CPU cores)')
+        parser.add_argument('--reset-passwords', action='store_true', help='Also set the CSV password on existing users')
+        parser.add_argument('--queued', action='store_true', help='Import web uploads waiting in the queue (run from cron)')
+        parser.add_argument('--resume', action='store_true', help='Also re-run imports interrupted mid-way, e.g. after a crash')
+
+    def handle(self, *args, **options):
+        if options['queued'] or options['resume']:
+            return self.run_queue(options)
+        if not options['roster']:
+            raise CommandError('Give a roster CSV path, --queued or --resume')
+        importer = RosterImporter(
+            batch_size=options['batch_size'],
+            processes=options['processes'],
+            reset_passwords=options['reset_passwords'],
+        )
+        with open(options['roster'], newline='', encoding='utf-8-sig') as fh:
+            stats = importer.run(fh)
+
+        for line_no, message in importer.errors:
+            self.stderr.write(f'line {line_no}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats['created']}, updated {stats['updated']}, "
+            f"unchanged {stats['unchanged']}, skipped {stats['skipped']}"
+        ))
+
+    def run_queue(self, options):
+        count = 0
+        if options['resume']:
+            # Only safe while no other worker is importing
+            for job in RosterImport.objects.filter(status='running').order_by('created_at'):
+                self.report(run_import(job, processes=options['processes']))
+                count += 1
+        while True:
+            job = claim_next_job()
+            if job is None:
+                break
+            self.report(run_import(job, processes=options['processes']))
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Ran {count} roster import(s)'))
+
+    def report(self, job):
+        self.stdout.write(f"{job.file_name}: {job.status} {job.stats}")
@@ -0,0 +1,18 @@
+# core/management/commands/refresh_ranks.py
+from django.core.management.base import BaseCommand
+
+from core.ranking import refresh_ranks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the rank snapshot table. Marks normally refresh it incrementally.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', default=None, help='Only rebuild this department')
+
+    def handle(self, *args, **options):
+        if options['department'] is not None:
+            count = refresh_ranks(options['department'])
+        else:
+            count = refresh_ranks(all_departments=True)
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} rank snapshots'))
@@ -0,0 +1,34 @@
+# core/management/commands/send_notifications.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Notification
+from core.notifications import create_deliveries, reclaim_stale, send_pending
+
+
+class Command(BaseCommand):
+    help = 'Send pending notification deliveries, e.g. ones interrupted by a worker restart.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notification', type=int, default=None, help='Only this notification; its delivery rows are (re)created first')
+        parser.add_argument(
+            '--reclaim-after', type=int, default=900,
+            help="Also resend rows stuck in 'sending' for this many seconds (default: 900)",
+        )
+        parser.add_argument('--workers', type=int, default=None, help='Sender threads (default: settings.NOTIFICATION_WORKERS)')
+
+    def handle(self, *args, **options):
+        notification = None
+        if options['notification'] is not None:
+            try:
+                notification = Notification.objects.get(pk=options['notification'])
+            except Notification.DoesNotExist:
+                raise CommandError(f"Notification {options['notification']} does not exist")
+            create_deliveries(notification)
+
+        reclaimed = reclaim_stale(options['reclaim_after'])
+        if reclaimed:
+            self.stdout.write(f'Reclaimed {reclaimed} stalled deliveries')
+        stats = send_pending(notification=notification, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {stats['sent']}, failed {stats['failed']} in {stats['elapsed']}s ({stats['per_sec']} msg/s)"
+        ))
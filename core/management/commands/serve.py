@@ -0,0 +1,98 @@
+# core/management/commands/serve.py
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def default_workers():
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the project under a pre-fork gunicorn server for production. '
+        'Send SIGHUP to the master (see --pidfile) for a graceful reload.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000', help='Address to listen on (default: 0.0.0.0:8000)')
+        parser.add_argument('--workers', type=int, default=default_workers(), help='Worker processes (default: 2 * CPU cores + 1)')
+        parser.add_argument('--threads', type=int, default=1, help='Threads per worker (default: 1)')
+        parser.add_argument('--max-requests', type=int, default=1000, help='Recycle a worker after this many requests, 0 to disable')
+        parser.add_argument('--max-requests-jitter', type=int, default=100, help='Random jitter added to --max-requests so workers do not restart together')
+        parser.add_argument('--timeout', type=int, default=30, help='Seconds before a silent worker is killed and restarted')
+        parser.add_argument('--graceful-timeout', type=int, default=30, help='Seconds workers get to finish in-flight requests on reload/shutdown')
+        parser.add_argument('--keepalive', type=int, default=5, help='Seconds to hold idle keep-alive connections')
+        parser.add_argument('--no-preload', action='store_false', dest='preload', help='Import the app in each worker instead of once in the master')
+        parser.add_argument('--asgi', action='store_true', help='Serve the ASGI application with uvicorn workers')
+        parser.add_argument('--pidfile', default=None, help='Write the master PID here')
+        parser.add_argument('--access-log', default=None, help="Access log path, '-' for stdout")
+        parser.add_argument('--insecure', action='store_true', help='Start even with DEBUG on or ALLOWED_HOSTS empty (local testing only)')
+
+    def check_settings(self, options):
+        problems = []
+        if settings.DEBUG:
+            problems.append('DEBUG is on; set DJANGO_DEBUG=0')
+        if not settings.ALLOWED_HOSTS:
+            problems.append('ALLOWED_HOSTS is empty; set DJANGO_ALLOWED_HOSTS to the served host names')
+        if settings.SECRET_KEY == 'your-secret-key-here':
+            self.stderr.write(self.style.WARNING('SECRET_KEY is the development placeholder; set DJANGO_SECRET_KEY'))
+        if problems and not options['insecure']:
+            raise CommandError('Refusing to serve: ' + '; '.join(problems) + '. Pass --insecure to override.')
+        for problem in problems:
+            self.stderr.write(self.style.WARNING(problem))
+
+    def handle(self, *args, **options):
+        self.check_settings(options)
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError('gunicorn is not installed. Install it with "pip install gunicorn".')
+
+        if options['asgi']:
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError('--asgi needs uvicorn. Install it with "pip install uvicorn".')
+            from sessional_project.asgi import application
+            worker_class = 'uvicorn.workers.UvicornWorker'
+        else:
+            from sessional_project.wsgi import application
+            worker_class = 'gthread' if options['threads'] > 1 else 'sync'
+
+        config = {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'worker_class': worker_class,
+            # The app is already imported here, so with preload the workers
+            # fork from a warm master and share its memory copy-on-write.
+            'preload_app': options['preload'],
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'keepalive': options['keepalive'],
+            'pidfile': options['pidfile'],
+            'accesslog': options['access_log'],
+            'errorlog': '-',
+            # Heartbeat files on tmpfs avoid stalls on slow disks
+            'worker_tmp_dir': '/dev/shm' if os.path.isdir('/dev/shm') else None,
+        }
+
+        class ProjectApplication(BaseApplication):
+            def load_config(self):
+                for key, value in config.items():
+                    if value is not None:
+                        self.cfg.set(key, value)
+
+            def load(self):
+                return application
+
+        self.stdout.write(
+            f"Starting {options['workers']} {worker_class} worker(s) on {options['bind']}"
+            f"{' (preloaded)' if options['preload'] else ''}"
+        )
+        ProjectApplication().run()
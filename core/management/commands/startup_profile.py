@@ -0,0 +1,105 @@
+# core/management/commands/startup_profile.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+COLD_START_SCRIPT = '''
+import json, os, time
+from wsgiref.util import setup_testing_defaults
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', %(settings)r)
+import django
+django.setup()
+ready = time.perf_counter()
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+environ = {
+    'PATH_INFO': %(path)r,
+    'HTTP_HOST': next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost'),
+}
+setup_testing_defaults(environ)
+statuses = []
+b''.join(WSGIHandler()(environ, lambda status, headers: statuses.append(status)))
+done = time.perf_counter()
+print(json.dumps({'setup': (ready - started) * 1000, 'first_request': (done - ready) * 1000, 'status': int(statuses[0].split()[0])}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile worker cold start: the slowest imports (python -X importtime) and '
+        'the time spent in django.setup() and serving the first request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Number of slowest imports to list (default: 20)')
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts to time; the median is reported (default: 5)')
+        parser.add_argument(
+            '--path', default='/login/',
+            help='URL requested as the first request; a rendered page so sessions and templates load (default: /login/)',
+        )
+        parser.add_argument('--check', action='store_true', help='Fail if the median exceeds settings.STARTUP_BUDGET_MS')
+
+    def handle(self, *args, **options):
+        script = COLD_START_SCRIPT % {'settings': os.environ['DJANGO_SETTINGS_MODULE'], 'path': options['path']}
+
+        if options['top']:
+            self._print_imports(script, options['top'])
+
+        samples = [self._cold_start(script) for _ in range(options['runs'])]
+        timings = {
+            key: statistics.median(sample[key] for sample in samples)
+            for key in ('setup', 'first_request')
+        }
+        timings['total'] = timings['setup'] + timings['first_request']
+        budget = getattr(settings, 'STARTUP_BUDGET_MS', {})
+
+        self.stdout.write(f"\nCold start (median of {options['runs']} runs, first request GET {options['path']}):")
+        over = []
+        for key, value in timings.items():
+            limit = budget.get(key)
+            line = f'  {key:<14} {value:8.1f} ms'
+            if limit is not None:
+                line += f'   budget {limit} ms'
+                if value > limit:
+                    over.append(key)
+                    line += '   OVER'
+            self.stdout.write(line)
+
+        if options['check'] and over:
+            raise CommandError(f"Cold-start budget exceeded: {', '.join(over)}")
+
+    def _cold_start(self, script):
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Cold start failed:\n{result.stderr}')
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        if sample['status'] >= 400:
+            raise CommandError(f"First request returned HTTP {sample['status']}")
+        return sample
+
+    def _print_imports(self, script, top):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            head, cumulative_us, name = line.split('|')
+            imports.append((int(head.split(':')[1]), int(cumulative_us), name.strip()))
+
+        self.stdout.write(f'Slowest {top} imports by self time (-X importtime):')
+        self.stdout.write(f"  {'self ms':>8} {'cumul ms':>9}  module")
+        for self_us, cumulative_us, name in sorted(imports, reverse=True)[:top]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} {cumulative_us / 1000:9.1f}  {name}')
@@ -0,0 +1,33 @@
+# core/management/commands/timetable_conflicts.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Event
+from core.scheduling import find_term_conflicts
+
+
+class Command(BaseCommand):
+    help = 'List events that share a venue at overlapping times.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=date.fromisoformat, default=None, help='Only events on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', type=date.fromisoformat, default=None, help='Only events on or before this date (YYYY-MM-DD)')
+        parser.add_argument('--check', action='store_true', help='Exit with an error if any clash is found')
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['start']:
+            events = events.filter(date__gte=options['start'])
+        if options['end']:
+            events = events.filter(date__lte=options['end'])
+
+        clashes = find_term_conflicts(events)
+        for other, event in clashes:
+            self.stdout.write(
+                f'{event.date} {event.venue}: "{other.title}" at {other.time:%H:%M} '
+                f'overlaps "{event.title}" at {event.time:%H:%M}'
+            )
+        if options['check'] and clashes:
+            raise CommandError(f'{len(clashes)} venue clash(es) found')
+        self.stdout.write(self.style.SUCCESS(f'{len(clashes)} venue clash(es) found'))
@@ -0,0 +1,32 @@
+# core/middleware.py
+from django.conf import settings
+
+from . import routers
+
+PIN_COOKIE = 'db_pin_primary'
+
+
+class ReplicaPinningMiddleware:
+    """Route a request's reads to the primary when it may need fresh data.
+
+    Unsafe methods and clients that wrote recently (tracked with a short
+    cookie) read from the primary; everyone else reads from the replica.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') or PIN_COOKIE in request.COOKIES
+        tokens = routers.start_request(pinned)
+        try:
+            response = self.get_response(request)
+            if routers.wrote_this_request():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 15),
+                    httponly=True, samesite='Lax',
+                )
+        finally:
+            routers.end_request(tokens)
+        return response
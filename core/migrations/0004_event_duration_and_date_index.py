@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_notification_target_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=60),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'time'], name='core_event_date_9a0efa_idx'),
+        ),
+    ]
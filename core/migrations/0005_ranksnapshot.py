@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_event_duration_and_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('event_type', models.CharField(choices=[('all', 'Overall'), ('sessional', 'Sessional Exam'), ('assignment', 'Assignment'), ('project', 'Project'), ('quiz', 'Quiz'), ('workshop', 'Workshop')], default='all', max_length=20)),
+                ('total_obtained', models.IntegerField()),
+                ('total_max', models.IntegerField()),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveIntegerField()),
+                ('percentile', models.FloatField()),
+                ('cohort_size', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['department', 'event_type', 'rank'],
+                'indexes': [models.Index(fields=['department', 'event_type', 'rank'], name='core_ranksn_departm_328f0d_idx')],
+                'unique_together': {('student', 'event_type')},
+            },
+        ),
+    ]
@@ -31,6 +31,7 @@ class Event(models.Model):
     event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES, default='sessional')
     date = models.DateField()
     time = models.TimeField(blank=True, null=True)
+    duration_minutes = models.PositiveIntegerField(default=60)
     venue = models.CharField(max_length=200, blank=True)
     description = models.TextField()
     max_marks = models.IntegerField(default=100)
@@ -49,6 +50,9 @@ class Event(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'time']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.date}"
@@ -74,21 +78,32 @@ class SessionalMark(models.Model):
         return (self.marks_obtained / self.event.max_marks) * 100
 
 
-class Notification(models.Model):
-    title = models.CharField(max_length=200)
-    message = models.TextField()
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications_created')
-    created_at = models.DateTimeField(auto_now_add=True)
-    is_active = models.BooleanField(default=True)
+class RankSnapshot(models.Model):
+    # Precomputed class rank, refreshed by core.ranking when marks change
+    ALL_TYPES = 'all'
+    SCOPE_CHOICES = (('all', 'Overall'),) + Event.EVENT_TYPE_CHOICES
+    
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rank_snapshots')
+    department = models.CharField(max_length=100, blank=True)
+    event_type = models.CharField(max_length=20, choices=SCOPE_CHOICES, default='all')
+    total_obtained = models.IntegerField()
+    total_max = models.IntegerField()
+    score = models.FloatField()
+    rank = models.PositiveIntegerField()
+    percentile = models.FloatField()
+    cohort_size = models.PositiveIntegerField()
+    computed_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        unique_together = ('student', 'event_type')
+        indexes = [
+            models.Index(fields=['department', 'event_type', 'rank']),
+        ]
+        ordering = ['department', 'event_type', 'rank']
     
     def __str__(self):
-        return self.title
-
+        return f"{self.student.username} - {self.get_event_type_display()} - #{self.rank}/{self.cohort_size}"
 
-# core/models.py - Update Notification model
 
 class Notification(models.Model):
     RECIPIENT_CHOICES = (
@@ -112,3 +127,75 @@ class Notification(models.Model):
     
     def __str__(self):
         return self.title
+
+
+class NotificationDelivery(models.Model):
+    # One row per recipient and channel, created by core.notifications fan-out
+    CHANNEL_CHOICES = (
+        ('in_app', 'In-app'),
+        ('email', 'Email'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_deliveries')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set when a sender claims the row, so concurrent senders skip it
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        unique_together = ('notification', 'recipient', 'channel')
+        indexes = [
+            models.Index(fields=['notification', 'status']),
+            models.Index(fields=['status', 'channel', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.notification.title} -> {self.recipient.username} ({self.channel}, {self.status})"
+
+
+class RosterImport(models.Model):
+    # An uploaded roster, imported later by `manage.py provision_users --queued`
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='roster_imports')
+    file_name = models.CharField(max_length=255)
+    roster = models.TextField()
+    reset_passwords = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(default=0)
+    stats = models.JSONField(default=dict, blank=True)
+    errors = models.JSONField(default=list, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    @property
+    def rows_done(self):
+        return sum(self.stats.values())
+    
+    @property
+    def percent(self):
+        return min(100, round(100 * self.rows_done / self.total_rows)) if self.total_rows else 100
+    
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
@@ -0,0 +1,252 @@
+# core/notifications.py
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import User, Notification, NotificationDelivery
+from .routers import PRIMARY
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+# Backends
+#
+# A backend only has to provide send(notification, email) and raise on
+# failure. Backends are called from pool threads and must not touch the
+# database.
+
+class MailBackend:
+    """Send through Django's EMAIL_BACKEND, keeping one open connection per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = self._local.connection = get_connection()
+            conn.open()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def send(self, notification, email):
+        EmailMessage(notification.title, notification.message, to=[email], connection=self._connection()).send()
+
+    def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+
+class FileBackend:
+    """Append each message as a JSON line to NOTIFICATION_FILE_PATH; a local stand-in for email."""
+
+    def __init__(self):
+        self.path = getattr(settings, 'NOTIFICATION_FILE_PATH', settings.BASE_DIR / 'sent_notifications.jsonl')
+        self._lock = threading.Lock()
+
+    def send(self, notification, email):
+        line = json.dumps({
+            'notification': notification.pk,
+            'to': email,
+            'title': notification.title,
+            'message': notification.message,
+            'sent_at': timezone.now().isoformat(),
+        })
+        with self._lock, open(self.path, 'a') as fh:
+            fh.write(line + '\n')
+
+    def close(self):
+        pass
+
+
+def get_backend():
+    return import_string(getattr(settings, 'NOTIFICATION_BACKEND', 'core.notifications.MailBackend'))()
+
+
+# Fan-out
+
+def recipients(notification):
+    """Stream (id, email) for every active user the notification targets."""
+    # Read from the primary: the stream stays open while delivery rows are
+    # written, and the replica may lag behind just-created accounts.
+    users = User.objects.using(PRIMARY).filter(is_active=True)
+    if notification.target_role != 'all':
+        users = users.filter(role=notification.target_role)
+    return users.order_by().values_list('pk', 'email').iterator(chunk_size=BATCH_SIZE)
+
+
+def create_deliveries(notification, batch_size=BATCH_SIZE):
+    """Create delivery rows in batches; safe to re-run, existing rows are kept.
+
+    The in-app row is the delivery itself, so it is stored as sent; email
+    rows start pending and are picked up by send_pending().
+    """
+    now = timezone.now()
+    batch = []
+    created = 0
+    for pk, email in recipients(notification):
+        batch.append(NotificationDelivery(
+            notification=notification, recipient_id=pk, channel='in_app', status='sent', sent_at=now,
+        ))
+        if email:
+            batch.append(NotificationDelivery(notification=notification, recipient_id=pk, channel='email'))
+        if len(batch) >= batch_size:
+            NotificationDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    if batch:
+        NotificationDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+def _send_with_retries(backend, notification, email, attempts, max_attempts):
+    error = ''
+    while attempts < max_attempts:
+        attempts += 1
+        try:
+            backend.send(notification, email)
+            return True, attempts, '', timezone.now()
+        except Exception as exc:
+            error = f'{type(exc).__name__}: {exc}'
+            if attempts < max_attempts:
+                time.sleep(getattr(settings, 'NOTIFICATION_RETRY_DELAY', 0.5) * 2 ** (attempts - 1))
+    return False, attempts, error, None
+
+
+def reclaim_stale(older_than):
+    """Return rows stuck in 'sending' (their sender died) to 'pending'."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return NotificationDelivery.objects.filter(status='sending', claimed_at__lt=cutoff).update(
+        status='pending', claimed_by='', claimed_at=None,
+    )
+
+
+def send_pending(notification=None, workers=None, max_attempts=None, batch_size=BATCH_SIZE):
+    """Send pending email deliveries through a bounded thread pool.
+
+    Each primary-key batch is first claimed with a conditional UPDATE
+    (pending -> sending), so concurrent senders never deliver the same row.
+    The pool threads only call the backend, and each batch's outcome is
+    written back with one bulk_update. Returns counters including the
+    achieved messages/sec.
+    """
+    workers = workers or getattr(settings, 'NOTIFICATION_WORKERS', 8)
+    max_attempts = max_attempts or getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 3)
+    # Claims must see the latest row state, so stay on the primary
+    deliveries = NotificationDelivery.objects.using(PRIMARY)
+    pending = deliveries.filter(status='pending', channel='email')
+    if notification is not None:
+        pending = pending.filter(notification=notification)
+
+    backend = get_backend()
+    token = uuid.uuid4().hex
+    notifications = {}
+    stats = {'sent': 0, 'failed': 0}
+    started = time.monotonic()
+    last_pk = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='notify') as pool:
+            while True:
+                ids = list(pending.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                last_pk = ids[-1]
+                claimed = pending.filter(pk__in=ids).update(status='sending', claimed_by=token, claimed_at=timezone.now())
+                if not claimed:
+                    continue
+                rows = list(
+                    deliveries.filter(pk__in=ids, status='sending', claimed_by=token).order_by('pk')
+                    .values_list('pk', 'notification_id', 'recipient__email', 'attempts')
+                )
+                missing = {row[1] for row in rows} - notifications.keys()
+                notifications.update(Notification.objects.in_bulk(missing))
+
+                results = pool.map(
+                    lambda row: _send_with_retries(backend, notifications[row[1]], row[2], row[3], max_attempts),
+                    rows,
+                )
+                updates = []
+                for (pk, _, _, _), (ok, attempts, error, sent_at) in zip(rows, results):
+                    updates.append(NotificationDelivery(
+                        pk=pk,
+                        status='sent' if ok else 'failed',
+                        attempts=attempts,
+                        last_error=error,
+                        sent_at=sent_at,
+                    ))
+                    stats['sent' if ok else 'failed'] += 1
+                deliveries.bulk_update(updates, fields=['status', 'attempts', 'last_error', 'sent_at'])
+    finally:
+        close = getattr(backend, 'close', None)
+        if close:
+            close()
+
+    elapsed = time.monotonic() - started
+    stats['elapsed'] = round(elapsed, 3)
+    stats['per_sec'] = round((stats['sent'] + stats['failed']) / elapsed, 1) if elapsed else None
+    logger.info('Notification delivery finished: %s', stats)
+    return stats
+
+
+def fan_out(notification):
+    create_deliveries(notification)
+    return send_pending(notification=notification)
+
+
+def schedule_fan_out(notification):
+    """Fan out after the surrounding transaction commits, off the request thread.
+
+    Anything left pending or stuck in 'sending' (e.g. the worker was
+    recycled mid-send) is resumed by `manage.py send_notifications`.
+    """
+    def run():
+        try:
+            fan_out(notification)
+        except Exception:
+            logger.exception('Notification %s fan-out failed', notification.pk)
+        finally:
+            connection.close()
+
+    def start():
+        if getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', True):
+            threading.Thread(target=run, name=f'notification-{notification.pk}', daemon=True).start()
+        else:
+            fan_out(notification)
+
+    transaction.on_commit(start)
+
+
+def delivery_progress(notification):
+    progress = notification.deliveries.aggregate(
+        total=Count('pk'),
+        pending=Count('pk', filter=Q(status='pending')),
+        sending=Count('pk', filter=Q(status='sending')),
+        sent=Count('pk', filter=Q(status='sent')),
+        failed=Count('pk', filter=Q(status='failed')),
+        emails_sent=Count('pk', filter=Q(status='sent', channel='email')),
+        first_email=Min('sent_at', filter=Q(status='sent', channel='email')),
+        last_email=Max('sent_at', filter=Q(status='sent', channel='email')),
+    )
+    first, last = progress.pop('first_email'), progress.pop('last_email')
+    elapsed = (last - first).total_seconds() if first and last else 0
+    progress['emails_per_sec'] = round(progress['emails_sent'] / elapsed, 1) if elapsed else None
+    progress['complete'] = progress['total'] > 0 and progress['pending'] == progress['sending'] == 0
+    return progress
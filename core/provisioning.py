@@ -0,0 +1,221 @@
+# core/provisioning.py
+import csv
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import lookups
+from .models import User, RosterImport
+from .ranking import schedule_refresh
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Below this many passwords per batch, hashing inline beats starting processes
+POOL_THRESHOLD = 32
+
+# Roster columns copied onto the user; enrollment_no is the upsert key
+PROFILE_FIELDS = ['username', 'email', 'first_name', 'last_name', 'role', 'department', 'phone']
+ROLES = {role for role, _ in User.ROLE_CHOICES}
+
+
+def _clean_row(row):
+    # Blank and missing cells are left out, so they never overwrite a profile
+    data = {key.strip().lower(): value.strip() for key, value in row.items() if key and value and value.strip()}
+    enrollment_no = data.get('enrollment_no')
+    if not enrollment_no:
+        raise ValueError('enrollment_no is required')
+    if 'role' in data and data['role'] not in ROLES:
+        raise ValueError(f'unknown role "{data["role"]}"')
+    cleaned = {'enrollment_no': enrollment_no}
+    for field in PROFILE_FIELDS:
+        if field in data:
+            cleaned[field] = data[field]
+    cleaned['password'] = data.get('password', '')
+    return cleaned
+
+
+class RosterImporter:
+    """Upsert users from a roster CSV, keyed on enrollment_no.
+
+    The CSV is read lazily and handled BATCH_SIZE rows at a time: one query
+    finds the existing users of a batch, new users are written with
+    bulk_create and changed users with bulk_update on just the columns that
+    changed. Password hashing is deliberately slow, so it runs in a process
+    pool shared by all batches.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, processes=None, reset_passwords=False, progress=None):
+        self.batch_size = batch_size
+        self.processes = processes or os.cpu_count() or 1
+        self.reset_passwords = reset_passwords
+        # Called with the running stats after each committed batch
+        self.progress = progress
+        self.stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        self.errors = []
+
+    def run(self, fileobj):
+        rows = enumerate(csv.DictReader(fileobj), start=2)  # line 1 is the header
+        self._pool = None
+        try:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch)
+                if self.progress:
+                    self.progress(self.stats)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+        return self.stats
+
+    def _hash(self, passwords):
+        # An empty password gives an unusable one; the user sets it via reset
+        passwords = [password or None for password in passwords]
+        if self.processes == 1 or len(passwords) < POOL_THRESHOLD:
+            return [make_password(password) for password in passwords]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        chunksize = max(1, len(passwords) // (self.processes * 4))
+        return list(self._pool.map(make_password, passwords, chunksize=chunksize))
+
+    def _import_batch(self, batch):
+        records = {}
+        for line_no, row in batch:
+            try:
+                record = _clean_row(row)
+            except ValueError as exc:
+                self._skip(line_no, str(exc))
+                continue
+            # A later line for the same student wins
+            records[record['enrollment_no']] = (line_no, record)
+
+        existing = {
+            user.enrollment_no: user
+            for user in User.objects.filter(enrollment_no__in=records).only('pk', 'password', 'enrollment_no', *PROFILE_FIELDS)
+        }
+        for key, (_, record) in records.items():
+            if key not in existing:
+                record.setdefault('username', key)
+                record.setdefault('role', 'student')
+        # username -> enrollment_no of whoever holds it now
+        owners = dict(
+            User.objects.filter(username__in=[record['username'] for _, record in records.values() if 'username' in record])
+            .values_list('username', 'enrollment_no')
+        )
+
+        to_create, to_update, changed_fields, departments = [], [], set(), set()
+        for key, (line_no, record) in records.items():
+            password = record.pop('password')
+            username = record.get('username')
+            if username and owners.get(username, key) != key:
+                self._skip(line_no, f'username "{username}" already belongs to another user')
+                continue
+            if username:
+                owners[username] = key
+            user = existing.get(key)
+            if user is None:
+                to_create.append((User(**record), password))
+                continue
+
+            changed = [field for field in PROFILE_FIELDS if field in record and (getattr(user, field) or '') != record[field]]
+            if 'department' in changed:
+                departments.update([user.department, record['department']])
+            for field in changed:
+                setattr(user, field, record[field])
+            if self.reset_passwords and password:
+                to_update.append((user, password))
+                changed.append('password')
+            elif changed:
+                to_update.append((user, None))
+            else:
+                self.stats['unchanged'] += 1
+            changed_fields.update(changed)
+
+        hashed = iter(self._hash(
+            [password for _, password in to_create] + [password for _, password in to_update if password]
+        ))
+        for user, _ in to_create:
+            user.password = next(hashed)
+        for user, password in to_update:
+            if password:
+                user.password = next(hashed)
+
+        with transaction.atomic():
+            User.objects.bulk_create([user for user, _ in to_create], batch_size=self.batch_size)
+            if to_update:
+                User.objects.bulk_update([user for user, _ in to_update], fields=sorted(changed_fields), batch_size=self.batch_size)
+            if departments:
+                # bulk_update skips signals, so refresh moved students' ranks here
+                schedule_refresh(*departments)
+            if to_create or to_update:
+                transaction.on_commit(lookups.students.invalidate)
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+
+    def _skip(self, line_no, message):
+        self.stats['skipped'] += 1
+        self.errors.append((line_no, message))
+
+
+# Queued imports
+#
+# Hashing is slow (about half a second per password), so uploads from the
+# web UI are only stored as a RosterImport. `manage.py provision_users
+# --queued`, run from cron or a supervised worker, claims and imports them in
+# its own process, where the hashing pool is safe to start.
+
+def queue_import(text, file_name, uploaded_by=None, reset_passwords=False):
+    total_rows = max(0, sum(1 for _ in csv.reader(io.StringIO(text))) - 1)
+    return RosterImport.objects.create(
+        uploaded_by=uploaded_by,
+        file_name=file_name,
+        roster=text,
+        reset_passwords=reset_passwords,
+        total_rows=total_rows,
+    )
+
+
+def claim_next_job():
+    """Claim the oldest queued import, or return None when there is none.
+
+    The claim is a conditional update, so workers running side by side never
+    import the same upload twice.
+    """
+    while True:
+        pk = RosterImport.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        if RosterImport.objects.filter(pk=pk, status='queued').update(status='running'):
+            return RosterImport.objects.get(pk=pk)
+
+
+def run_import(job, processes=None):
+    """Import a claimed roster, recording progress on the job after each batch.
+
+    Batches commit as they go, and re-running a roster is an idempotent
+    upsert, so an interrupted job can simply be run again.
+    """
+    RosterImport.objects.filter(pk=job.pk).update(status='running', stats={}, errors=[], last_error='')
+    importer = RosterImporter(
+        processes=processes,
+        reset_passwords=job.reset_passwords,
+        progress=lambda stats: RosterImport.objects.filter(pk=job.pk).update(stats=dict(stats)),
+    )
+    try:
+        importer.run(io.StringIO(job.roster, newline=''))
+    except Exception as exc:
+        logger.exception('Roster import %s failed', job.pk)
+        job.status, job.last_error = 'failed', f'{type(exc).__name__}: {exc}'
+    else:
+        job.status = 'done'
+    job.stats, job.errors, job.finished_at = importer.stats, importer.errors, timezone.now()
+    job.save(update_fields=['status', 'stats', 'errors', 'last_error', 'finished_at'])
+    return job
@@ -0,0 +1,163 @@
+# core/ranking.py
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum, FloatField, ExpressionWrapper, Window
+from django.db.models.functions import NullIf, Rank, PercentRank
+from django.utils import timezone
+
+from .models import User, SessionalMark, RankSnapshot
+
+logger = logging.getLogger(__name__)
+
+ALL_TYPES = RankSnapshot.ALL_TYPES
+SNAPSHOT_FIELDS = ['department', 'total_obtained', 'total_max', 'score', 'rank', 'percentile', 'cohort_size']
+
+
+def _department_filter(department, prefix='student__'):
+    # Users without a department share the '' cohort
+    if department:
+        return Q(**{f'{prefix}department': department})
+    return Q(**{f'{prefix}department__isnull': True}) | Q(**{f'{prefix}department': ''})
+
+
+def _ranked_totals(marks, by_type):
+    group = ['student', 'student__department'] + (['event__event_type'] if by_type else [])
+    partition = [F('student__department')] + ([F('event__event_type')] if by_type else [])
+    order = F('score').desc()
+    return (
+        marks.order_by()
+        .values(*group)
+        .annotate(
+            obtained=Sum('marks_obtained'),
+            maximum=Sum('event__max_marks'),
+        )
+        .annotate(
+            # Weighted by max_marks: a 100-mark sessional counts more than a 10-mark quiz
+            score=ExpressionWrapper(100.0 * F('obtained') / NullIf(F('maximum'), 0), output_field=FloatField()),
+        )
+        .filter(maximum__gt=0)
+        .annotate(
+            rank=Window(Rank(), partition_by=partition, order_by=order),
+            percent_rank=Window(PercentRank(), partition_by=partition, order_by=order),
+        )
+    )
+
+
+def refresh_ranks(department=None, all_departments=False):
+    """Recompute the rank snapshots of one department (or all of them).
+
+    A mark change can shift every rank in its cohort, so the unit of
+    refresh is the department: two window-function queries, then only the
+    snapshot rows whose values changed are written, in one transaction.
+    Returns the number of snapshots the department now has.
+    """
+    marks = SessionalMark.objects.all()
+    snapshots = RankSnapshot.objects.all()
+    if not all_departments:
+        marks = marks.filter(_department_filter(department))
+        # Also clear rows left under a student's previous department
+        members = User.objects.filter(_department_filter(department, prefix=''))
+        snapshots = snapshots.filter(Q(department=department or '') | Q(student__in=members))
+
+    rows = list(_ranked_totals(marks, by_type=True)) + [
+        dict(row, event__event_type=ALL_TYPES) for row in _ranked_totals(marks, by_type=False)
+    ]
+    cohort_sizes = {}
+    for row in rows:
+        key = (row['student__department'] or '', row['event__event_type'])
+        cohort_sizes[key] = cohort_sizes.get(key, 0) + 1
+
+    now = timezone.now()
+    existing = {(snapshot.student_id, snapshot.event_type): snapshot for snapshot in snapshots}
+    to_create, to_update = [], []
+    for row in rows:
+        key = (row['student__department'] or '', row['event__event_type'])
+        values = {
+            'department': key[0],
+            'total_obtained': row['obtained'],
+            'total_max': row['maximum'],
+            'score': row['score'],
+            'rank': row['rank'],
+            'percentile': round(100 * (1 - row['percent_rank']), 2),
+            'cohort_size': cohort_sizes[key],
+        }
+        snapshot = existing.pop((row['student'], key[1]), None)
+        if snapshot is None:
+            to_create.append(RankSnapshot(student_id=row['student'], event_type=key[1], **values))
+        elif any(getattr(snapshot, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(snapshot, field, value)
+            snapshot.computed_at = now  # bulk_update skips auto_now
+            to_update.append(snapshot)
+
+    with transaction.atomic():
+        # Whatever is left no longer has marks in this department
+        RankSnapshot.objects.filter(pk__in=[snapshot.pk for snapshot in existing.values()]).delete()
+        RankSnapshot.objects.bulk_update(to_update, fields=SNAPSHOT_FIELDS + ['computed_at'], batch_size=1000)
+        RankSnapshot.objects.bulk_create(to_create, batch_size=1000)
+    return len(rows)
+
+
+# Deferred refresh: departments touched in a transaction are handed over
+# once it commits, and a per-process timer rebuilds each of them at most
+# once per RANK_REFRESH_DELAY_SECONDS, off the request thread. Marks
+# entered one by one therefore cost one rebuild per window, not one each.
+# A refresh lost with its process is redone by `manage.py refresh_ranks`.
+_pending = threading.local()
+_dirty = set()
+_dirty_lock = threading.Lock()
+_timer = None
+
+
+def schedule_refresh(*departments):
+    pending = getattr(_pending, 'departments', None)
+    if pending is None:
+        pending = _pending.departments = set()
+    pending.update(department or '' for department in departments)
+    # Registered on every call: a rolled-back block discards its callbacks,
+    # and the first _flush to run drains the set for the later ones.
+    # Runs immediately when not inside a transaction.
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    global _timer
+    departments = getattr(_pending, 'departments', None)
+    _pending.departments = None
+    if not departments:
+        return
+    if not getattr(settings, 'RANK_REFRESH_ASYNC', True):
+        for department in departments:
+            refresh_ranks(department)
+        return
+    with _dirty_lock:
+        _dirty.update(departments)
+        if _timer is None:
+            _timer = threading.Timer(getattr(settings, 'RANK_REFRESH_DELAY_SECONDS', 2), _refresh_dirty)
+            _timer.daemon = True
+            _timer.start()
+
+
+def _refresh_dirty():
+    global _timer
+    with _dirty_lock:
+        departments = set(_dirty)
+        _dirty.clear()
+        _timer = None
+    try:
+        for department in departments:
+            try:
+                refresh_ranks(department)
+            except Exception:
+                logger.exception('Rank refresh for department %r failed', department)
+    finally:
+        connection.close()
+
+
+def departments_for_event(event):
+    return set(
+        User.objects.filter(marks__event=event).order_by().values_list('department', flat=True).distinct()
+    )
@@ -0,0 +1,74 @@
+# core/routers.py
+import contextvars
+
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+ARCHIVE = 'archive'
+
+# Set for the rest of a request (or thread) once it must see its own writes
+_pinned = contextvars.ContextVar('core_db_pinned', default=False)
+_wrote = contextvars.ContextVar('core_db_wrote', default=False)
+
+
+def start_request(pinned):
+    return _pinned.set(pinned), _wrote.set(False)
+
+
+def end_request(tokens):
+    _pinned.reset(tokens[0])
+    _wrote.reset(tokens[1])
+
+
+def wrote_this_request():
+    return _wrote.get()
+
+
+def _replica_enabled():
+    # A replica pointing at the primary's own database (or mirroring it under
+    # test) only adds a second connection and lock contention
+    if REPLICA not in connections.settings:
+        return False
+    primary, replica = connections[PRIMARY].settings_dict, connections[REPLICA].settings_dict
+    return any(primary.get(key) != replica.get(key) for key in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+
+
+def _archived(hints):
+    # Related lookups from an archived row must stay in the archive
+    instance = hints.get('instance')
+    return instance is not None and instance._state.db == ARCHIVE
+
+
+class PrimaryReplicaRouter:
+    """Send reads to the replica and writes to the primary.
+
+    After the first write, reads in the same request/thread go to the
+    primary too, and ReplicaPinningMiddleware keeps the client on the
+    primary for REPLICA_STICKY_SECONDS so it reads its own writes. The
+    archive database is only used through explicit .using('archive').
+    """
+
+    def db_for_read(self, model, **hints):
+        if _archived(hints):
+            return ARCHIVE
+        if _pinned.get() or not _replica_enabled():
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        if _archived(hints):
+            return ARCHIVE
+        _pinned.set(True)
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        live = {PRIMARY, REPLICA}
+        if obj1._state.db in live and obj2._state.db in live:
+            return True
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db != REPLICA
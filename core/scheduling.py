@@ -0,0 +1,126 @@
+# core/scheduling.py
+import calendar
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+
+
+def event_interval(event):
+    """Return the (start, end) datetimes an event occupies, or None if it has no time slot."""
+    if event.date is None or event.time is None:
+        return None
+    start = datetime.combine(event.date, event.time)
+    return start, start + timedelta(minutes=event.duration_minutes or 0)
+
+
+class IntervalIndex:
+    """Intervals kept sorted by start time.
+
+    Because no stored interval is longer than ``max_length``, every interval
+    overlapping [start, end) begins inside (start - max_length, end), so a
+    lookup is two bisections plus a scan of that window only.
+    """
+
+    def __init__(self, items=()):
+        self._starts = []
+        self._entries = []
+        self.max_length = timedelta(0)
+        for start, end, value in items:
+            self.add(start, end, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, start, end, value):
+        pos = bisect_right(self._starts, start)
+        self._starts.insert(pos, start)
+        self._entries.insert(pos, (start, end, value))
+        self.max_length = max(self.max_length, end - start)
+
+    def overlapping(self, start, end):
+        lo = bisect_right(self._starts, start - self.max_length)
+        hi = bisect_left(self._starts, end)
+        return [value for s, e, value in self._entries[lo:hi] if e > start and s < end]
+
+
+def find_conflicts(event, students=()):
+    """Return a list of human readable clashes for ``event``.
+
+    Venue clashes are checked against every other timed event on the same
+    day; student clashes only against events explicitly assigned to one of
+    ``students`` (events with no assignment are open to everyone and never
+    count as a clash).
+    """
+    from .models import Event
+
+    interval = event_interval(event)
+    if interval is None:
+        return []
+    start, end = interval
+
+    same_day = Event.objects.filter(date=event.date, time__isnull=False)
+    if event.pk:
+        same_day = same_day.exclude(pk=event.pk)
+    if end.date() == event.date:
+        # Nothing starting after this event ends can overlap it
+        same_day = same_day.filter(time__lt=end.time())
+
+    conflicts = []
+    if event.venue:
+        others = same_day.filter(venue__iexact=event.venue).only('title', 'date', 'time', 'duration_minutes', 'venue')
+        for other in others.order_by('time'):
+            if event_interval(other)[1] > start:
+                conflicts.append(
+                    f'Venue "{event.venue}" is already booked for "{other.title}" '
+                    f'at {other.time:%H:%M} on {other.date}'
+                )
+
+    student_ids = [getattr(s, 'pk', s) for s in students]
+    if student_ids:
+        Assignment = Event.assigned_students.through
+        rows = (
+            Assignment.objects.filter(event__in=same_day, user_id__in=student_ids)
+            .order_by('event__time', 'user__username')
+            .values_list('user__username', 'event__title', 'event__time', 'event__duration_minutes')
+        )
+        for username, title, time, duration in rows:
+            if datetime.combine(event.date, time) + timedelta(minutes=duration) > start:
+                conflicts.append(f'{username} already has "{title}" at {time:%H:%M} on {event.date}')
+
+    return conflicts
+
+
+def find_term_conflicts(events):
+    """Sweep a whole timetable and return (event, other) pairs sharing a venue slot.
+
+    ``events`` should be a queryset; each venue/day gets its own index, so the
+    work is O(n log n) rather than comparing every pair of events.
+    """
+    indexes = {}
+    clashes = []
+    for event in events.filter(time__isnull=False).exclude(venue='').order_by('date', 'time'):
+        start, end = event_interval(event)
+        index = indexes.setdefault((event.date, event.venue.lower()), IntervalIndex())
+        for other in index.overlapping(start, end):
+            clashes.append((other, event))
+        index.add(start, end, event)
+    return clashes
+
+
+# Calendar windows
+
+def month_window(year, month):
+    """Return (weeks, first_day, last_day) for the month grid, padded to whole weeks."""
+    weeks = calendar.Calendar(firstweekday=calendar.MONDAY).monthdatescalendar(year, month)
+    return weeks, weeks[0][0], weeks[-1][-1]
+
+
+def week_window(year, week):
+    first_day = date.fromisocalendar(year, week, 1)
+    return [first_day + timedelta(days=i) for i in range(7)], first_day, first_day + timedelta(days=6)
+
+
+def events_by_day(events):
+    days = {}
+    for event in events:
+        days.setdefault(event.date, []).append(event)
+    return days
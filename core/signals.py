@@ -0,0 +1,82 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import lookups
+from .models import User, Event, SessionalMark, RankSnapshot
+from .ranking import schedule_refresh, departments_for_event
+
+# User columns the mark entry student lookup shows or filters on
+LOOKUP_FIELDS = {'username', 'enrollment_no', 'department', 'role'}
+
+
+@receiver(post_save, sender=SessionalMark)
+@receiver(post_delete, sender=SessionalMark)
+def refresh_ranks_for_mark(sender, instance, **kwargs):
+    # Looked up by id: on a cascading user delete the student may already be gone
+    departments = list(User.objects.filter(pk=instance.student_id).values_list('department', flat=True))
+    if departments:
+        schedule_refresh(*departments)
+
+
+# Event fields that feed into rank scores
+RANK_FIELDS = ('max_marks', 'event_type')
+
+
+@receiver(pre_save, sender=Event)
+def remember_rank_fields(sender, instance, **kwargs):
+    # Stored values, compared in post_save so title or venue edits are skipped
+    instance._stored_rank_fields = (
+        Event.objects.filter(pk=instance.pk).values_list(*RANK_FIELDS).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Event)
+def refresh_ranks_for_event(sender, instance, created, **kwargs):
+    # max_marks or event_type edits move every score for the event
+    stored = getattr(instance, '_stored_rank_fields', None)
+    if created or stored is None or stored == tuple(getattr(instance, field) for field in RANK_FIELDS):
+        return
+    departments = departments_for_event(instance)
+    if departments:
+        schedule_refresh(*departments)
+
+
+@receiver(post_save, sender=User)
+def refresh_ranks_for_user(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'department' not in update_fields):
+        return
+    moved_from = set(
+        RankSnapshot.objects.filter(student=instance)
+        .exclude(department=instance.department or '')
+        .values_list('department', flat=True)
+    )
+    if moved_from:
+        schedule_refresh(instance.department, *moved_from)
+
+
+@receiver(post_delete, sender=User)
+def refresh_ranks_for_deleted_user(sender, instance, **kwargs):
+    if instance.role == 'student':
+        schedule_refresh(instance.department)
+
+
+# Invalidate after commit, so no worker reloads a lookup before the change is visible
+
+@receiver(post_save, sender=User)
+def invalidate_student_lookup(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; they must not throw the roster away
+    if update_fields is None or LOOKUP_FIELDS & set(update_fields):
+        transaction.on_commit(lookups.students.invalidate)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_student_lookup_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lookups.students.invalidate)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_lookup(sender, instance, **kwargs):
+    transaction.on_commit(lookups.events.invalidate)
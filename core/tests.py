@@ -1,3 +1,486 @@
-from django.test import TestCase
+import io
+import threading
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import archive, lookups, ranking, routers
+from .archive import ArchiveError, archive_events_before, archived_marks
+from .forms import EventForm
+from .lookups import Snapshot
+from .models import User, Event, SessionalMark, RankSnapshot, Notification, NotificationDelivery, RosterImport
+from .notifications import create_deliveries, reclaim_stale, send_pending
+from .provisioning import RosterImporter, claim_next_job, queue_import
+from .scheduling import IntervalIndex, find_conflicts
+from .views import _event_progress
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class RouterTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.student = User.objects.create_user('stu', password='x', role='student')
+        self.tokens = routers.start_request(False)
+
+    def tearDown(self):
+        routers.end_request(self.tokens)
+
+    def test_reads_use_the_primary_without_a_separate_replica(self):
+        # No replica is configured under test
+        self.assertEqual(routers.PrimaryReplicaRouter().db_for_read(User), routers.PRIMARY)
+        self.client.login(username='stu', password='x')
+        self.assertEqual(self.client.get('/dashboard/').status_code, 200)
+
+    def test_reads_follow_writes_to_the_primary(self):
+        router = routers.PrimaryReplicaRouter()
+        with mock.patch('core.routers._replica_enabled', return_value=True):
+            self.assertEqual(router.db_for_read(User), routers.REPLICA)
+            self.assertEqual(router.db_for_write(User), routers.PRIMARY)
+            self.assertEqual(router.db_for_read(User), routers.PRIMARY)
+        self.assertTrue(routers.wrote_this_request())
+
+    def test_archived_instances_stay_in_the_archive(self):
+        instance = User(pk=1)
+        instance._state.db = routers.ARCHIVE
+        self.assertEqual(routers.PrimaryReplicaRouter().db_for_read(Event, instance=instance), routers.ARCHIVE)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ArchiveTests(TestCase):
+    databases = {'default', 'archive'}
+
+    def setUp(self):
+        self.faculty = User.objects.create_user('fac', password='x', role='faculty')
+        self.student = User.objects.create_user('stu', password='x', role='student', department='CS')
+
+    def add_event(self, title, day, student=None, by=None):
+        event = Event.objects.create(title=title, date=day, description='d', created_by=by or self.faculty)
+        if student:
+            event.assigned_students.add(student)
+            SessionalMark.objects.create(student=student, event=event, marks_obtained=10, entered_by=self.faculty)
+        return event
+
+    def test_moves_old_events_with_their_marks(self):
+        old = self.add_event('Old', date(2020, 3, 1), self.student)
+        self.add_event('New', date(2026, 3, 1), self.student)
+        entered_at = SessionalMark.objects.get(event=old).entered_at
+
+        self.assertEqual(archive_events_before(date(2025, 1, 1)), (1, 1))
+
+        self.assertFalse(Event.objects.filter(pk=old.pk).exists())
+        self.assertEqual(SessionalMark.objects.filter(student=self.student).count(), 1)
+        mark = archived_marks(self.student).get()
+        self.assertEqual(mark.event.title, 'Old')
+        self.assertEqual(mark.entered_at, entered_at)
+        self.assertEqual(mark.event.assigned_students.count(), 1)
+
+    def test_reused_username_is_archived_under_a_distinct_name(self):
+        bob = User.objects.create_user('bob', password='x', role='faculty')
+        self.add_event('First', date(2020, 3, 1), self.student, by=bob)
+        archive_events_before(date(2025, 1, 1))
+        bob.delete()
+        new_bob = User.objects.create_user('bob', password='x', role='student')
+        self.add_event('Second', date(2020, 4, 1), new_bob)
+
+        self.assertEqual(archive_events_before(date(2025, 1, 1)), (1, 1))
+
+        self.assertEqual(archived_marks(new_bob).get().event.title, 'Second')
+        self.assertEqual(User.objects.using(routers.ARCHIVE).get(pk=new_bob.pk).username, f'bob#{new_bob.pk}')
+
+    def test_incomplete_copy_leaves_rows_on_the_primary(self):
+        old = self.add_event('Old', date(2020, 3, 1), self.student)
+        copy = archive._copy
+
+        def copy_without_marks(model, objs, timestamp_fields):
+            if model is not SessionalMark:
+                copy(model, objs, timestamp_fields)
+
+        with mock.patch('core.archive._copy', copy_without_marks), self.assertRaises(ArchiveError):
+            archive_events_before(date(2025, 1, 1))
+
+        self.assertTrue(SessionalMark.objects.filter(event=old).exists())
+        self.assertFalse(Event.objects.using(routers.ARCHIVE).filter(pk=old.pk).exists())
+
+
+class IntervalIndexTests(TestCase):
+    def test_overlapping_uses_half_open_intervals(self):
+        day = datetime(2026, 3, 2)
+        index = IntervalIndex([
+            (day.replace(hour=9), day.replace(hour=12), 'long'),
+            (day.replace(hour=10), day.replace(hour=10, minute=30), 'short'),
+            (day.replace(hour=13), day.replace(hour=14), 'after'),
+        ])
+        self.assertEqual(index.overlapping(day.replace(hour=11), day.replace(hour=13)), ['long'])
+        self.assertEqual(sorted(index.overlapping(day.replace(hour=10), day.replace(hour=10, minute=15))), ['long', 'short'])
+        self.assertEqual(index.overlapping(day.replace(hour=12), day.replace(hour=13)), [])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ConflictTests(TestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user('fac', password='x', role='faculty')
+        self.student = User.objects.create_user('stu', password='x', role='student')
+        self.quiz = Event.objects.create(
+            title='Quiz', date=date(2026, 3, 2), time=time(9), duration_minutes=90,
+            venue='Hall A', description='d', created_by=self.faculty,
+        )
+        self.quiz.assigned_students.add(self.student)
+
+    def candidate(self, start, minutes=60, venue=''):
+        return Event(date=date(2026, 3, 2), time=start, duration_minutes=minutes, venue=venue)
+
+    def test_venue_clash_is_case_insensitive_and_ends_exclusive(self):
+        self.assertEqual(len(find_conflicts(self.candidate(time(10), venue='hall a'))), 1)
+        self.assertEqual(find_conflicts(self.candidate(time(10, 30), venue='Hall A')), [])
+        self.assertEqual(find_conflicts(self.candidate(time(10), venue='Hall B')), [])
+
+    def test_student_clash_only_for_assigned_students(self):
+        self.assertIn('stu already has "Quiz"', find_conflicts(self.candidate(time(8, 30)), [self.student])[0])
+        other = User.objects.create_user('other', password='x', role='student')
+        self.assertEqual(find_conflicts(self.candidate(time(8, 30)), [other]), [])
+
+    def test_event_form_checks_assigned_students_on_create(self):
+        form = EventForm(data={
+            'title': 'Lab', 'event_type': self.quiz.event_type, 'date': '2026-03-02', 'time': '10:00',
+            'duration_minutes': 60, 'venue': 'Lab 1', 'description': 'd', 'max_marks': 50,
+            'assigned_students': [self.student.pk],
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('stu already has "Quiz"', form.non_field_errors()[0])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class EventProgressTests(TestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user('fac', password='x', role='faculty')
+        self.students = [User.objects.create_user(f's{i}', password='x', role='student') for i in range(4)]
+
+    def event(self, title, day):
+        return Event.objects.create(title=title, date=day, description='d', created_by=self.faculty, max_marks=50)
+
+    def mark(self, event, student, marks):
+        SessionalMark.objects.create(student=student, event=event, marks_obtained=marks, entered_by=self.faculty)
+
+    def test_only_marks_from_assigned_students_count(self):
+        quiz = self.event('Quiz', date(2026, 3, 2))
+        quiz.assigned_students.add(*self.students[:2])
+        self.mark(quiz, self.students[0], 10)
+        self.mark(quiz, self.students[3], 40)
+
+        progress, = _event_progress(Event.objects.all())
+
+        self.assertEqual((progress.assigned_count, progress.audience), (2, 2))
+        self.assertEqual((progress.marks_entered, progress.pending_count), (1, 1))
+        self.assertEqual((progress.avg_marks, progress.top_marks), (10, 10))
+
+    def test_open_event_counts_every_student_but_not_staff(self):
+        viva = self.event('Viva', date(2026, 3, 3))
+        self.mark(viva, self.students[0], 20)
+        self.mark(viva, self.faculty, 30)
+
+        progress, = _event_progress(Event.objects.all())
+
+        self.assertEqual((progress.assigned_count, progress.audience), (0, 4))
+        self.assertEqual((progress.marks_entered, progress.pending_count, progress.top_marks), (1, 3, 20))
+
+    def test_dashboard_pages_are_ordered(self):
+        for day in range(1, 13):
+            self.event(f'E{day}', date(2026, 3, day))
+        self.client.login(username='fac', password='x')
+        first = [event.title for event in self.client.get('/dashboard/').context['events']]
+        second = [event.title for event in self.client.get('/dashboard/?page=2').context['events']]
+        self.assertEqual(first[:2], ['E12', 'E11'])
+        self.assertEqual(second, ['E2', 'E1'])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, RANK_REFRESH_ASYNC=False)
+class RankTests(TestCase):
+    def setUp(self):
+        self.faculty = User.objects.create_user('fac', password='x', role='faculty')
+        self.quiz = Event.objects.create(title='Quiz', date=date(2026, 3, 2), description='d', created_by=self.faculty, max_marks=50)
+        # Departments left pending by earlier tests, whose transactions never commit
+        ranking._pending.departments = None
+
+    def student(self, name, department='CS', marks=None):
+        student = User.objects.create_user(name, password='x', role='student', department=department)
+        if marks is not None:
+            with self.captureOnCommitCallbacks(execute=True):
+                SessionalMark.objects.create(student=student, event=self.quiz, marks_obtained=marks, entered_by=self.faculty)
+        return student
+
+    def overall(self, student):
+        return RankSnapshot.objects.get(student=student, event_type=RankSnapshot.ALL_TYPES)
+
+    def test_rank_and_percentile_within_department(self):
+        top, tied, other, last = self.student('a', marks=45), self.student('b', marks=45), self.student('c', marks=30), self.student('d', marks=10)
+        self.student('e', department='EE', marks=5)
+
+        self.assertEqual([self.overall(s).rank for s in (top, tied, other, last)], [1, 1, 3, 4])
+        self.assertEqual(self.overall(top).percentile, 100)
+        self.assertEqual(self.overall(last).percentile, 0)
+        self.assertEqual(self.overall(last).cohort_size, 4)
+        self.assertEqual(self.overall(top).score, 90)
+
+    def test_moved_student_leaves_the_old_cohort(self):
+        mover, stayer = self.student('a', marks=40), self.student('b', marks=20)
+        with self.captureOnCommitCallbacks(execute=True):
+            mover.department = 'EE'
+            mover.save()
+
+        self.assertEqual(self.overall(mover).department, 'EE')
+        self.assertEqual((self.overall(stayer).rank, self.overall(stayer).cohort_size), (1, 1))
+        self.assertEqual(RankSnapshot.objects.filter(department='CS').count(), 2)  # overall + sessional
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        self.student('a', marks=40)
+        with CaptureQueriesContext(connection) as queries:
+            ranking.refresh_ranks('CS')
+        writes = [q['sql'] for q in queries if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(writes, [])
+
+    def test_event_edit_refreshes_only_for_score_fields(self):
+        student = self.student('a', marks=40)
+        with mock.patch('core.signals.schedule_refresh') as schedule:
+            self.quiz.title = 'Renamed'
+            self.quiz.save()
+            schedule.assert_not_called()
+            self.quiz.max_marks = 80
+            self.quiz.save()
+            schedule.assert_called_once_with('CS')
+        with self.captureOnCommitCallbacks(execute=True):
+            ranking.schedule_refresh('CS')
+        self.assertEqual(self.overall(student).score, 50)
+
+    @override_settings(RANK_REFRESH_ASYNC=True, RANK_REFRESH_DELAY_SECONDS=60)
+    def test_async_refreshes_are_coalesced_per_department(self):
+        with mock.patch('threading.Timer') as timer, mock.patch('core.ranking.refresh_ranks') as refresh, \
+                mock.patch('core.ranking.connection'):
+            for _ in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    ranking.schedule_refresh('CS')
+            self.assertEqual(timer.call_count, 1)
+            ranking._refresh_dirty()
+        refresh.assert_called_once_with('CS')
+
+
+class RecordingBackend:
+    """Notification backend for tests; addresses in ``failures`` fail that many times."""
+
+    sent = []
+    failures = {}
+    lock = threading.Lock()
+
+    def send(self, notification, email):
+        with self.lock:
+            if self.failures.get(email):
+                self.failures[email] -= 1
+                raise OSError('mailbox unavailable')
+            self.sent.append(email)
+
+
+@override_settings(
+    PASSWORD_HASHERS=FAST_HASHER,
+    NOTIFICATION_BACKEND='core.tests.RecordingBackend',
+    NOTIFICATION_RETRY_DELAY=0,
+    NOTIFICATION_MAX_ATTEMPTS=3,
+)
+class NotificationDeliveryTests(TestCase):
+    def setUp(self):
+        RecordingBackend.sent, RecordingBackend.failures = [], {}
+        admin = User.objects.create_user('adm', password='x', role='admin')
+        for name in ('ann', 'ben', 'cat'):
+            User.objects.create_user(name, password='x', role='student', email=f'{name}@example.com')
+        User.objects.create_user('dan', password='x', role='student')  # no email: in-app only
+        self.notification = Notification.objects.create(title='Exam', message='m', created_by=admin, target_role='student')
+        create_deliveries(self.notification)
+
+    def email(self, name):
+        return NotificationDelivery.objects.get(channel='email', recipient__username=name)
+
+    def test_deliveries_per_recipient_and_channel(self):
+        self.assertEqual(self.notification.deliveries.filter(channel='in_app', status='sent').count(), 4)
+        self.assertEqual(self.notification.deliveries.filter(channel='email', status='pending').count(), 3)
+
+    def test_retries_until_sent_or_out_of_attempts(self):
+        RecordingBackend.failures = {'ben@example.com': 1, 'cat@example.com': 5}
+
+        stats = send_pending(notification=self.notification)
+
+        self.assertEqual((stats['sent'], stats['failed']), (2, 1))
+        self.assertEqual((self.email('ben').status, self.email('ben').attempts), ('sent', 2))
+        cat = self.email('cat')
+        self.assertEqual((cat.status, cat.attempts), ('failed', 3))
+        self.assertIn('mailbox unavailable', cat.last_error)
+
+    def test_rows_claimed_by_another_sender_are_skipped(self):
+        NotificationDelivery.objects.filter(pk=self.email('ann').pk).update(
+            status='sending', claimed_by='other', claimed_at=timezone.now(),
+        )
+
+        send_pending()
+        send_pending()
+
+        self.assertEqual(sorted(RecordingBackend.sent), ['ben@example.com', 'cat@example.com'])
+        self.assertEqual(self.email('ann').status, 'sending')
+
+    def test_stale_claims_are_reclaimed(self):
+        NotificationDelivery.objects.filter(pk=self.email('ann').pk).update(
+            status='sending', claimed_by='dead', claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        NotificationDelivery.objects.filter(pk=self.email('ben').pk).update(
+            status='sending', claimed_by='busy', claimed_at=timezone.now(),
+        )
+
+        self.assertEqual(reclaim_stale(900), 1)
+        send_pending()
+
+        self.assertIn('ann@example.com', RecordingBackend.sent)
+        self.assertNotIn('ben@example.com', RecordingBackend.sent)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class RosterImportTests(TestCase):
+    def setUp(self):
+        ranking._pending.departments = None
+        self.existing = User.objects.create_user(
+            'ann', password='old', role='faculty', enrollment_no='E1',
+            email='ann@example.com', department='CS', phone='555',
+        )
+
+    def run_import(self, text, **kwargs):
+        importer = RosterImporter(processes=1, **kwargs)
+        stats = importer.run(io.StringIO(text))
+        return stats, importer.errors
+
+    def test_creates_updates_and_counts_unchanged(self):
+        stats, errors = self.run_import(
+            'enrollment_no,username,email,department\n'
+            'E1,ann,ann@example.com,CS\n'
+            'E2,,ben@example.com,EE\n'
+            'E3,cat,,\n'
+            'E2,ben2,ben@example.com,EE\n'
+        )
+
+        self.assertEqual(stats, {'created': 2, 'updated': 0, 'unchanged': 1, 'skipped': 0})
+        self.assertEqual(errors, [])
+        ben = User.objects.get(enrollment_no='E2')
+        self.assertEqual((ben.username, ben.role, ben.department), ('ben2', 'student', 'EE'))
+        self.assertFalse(ben.has_usable_password())
+        self.assertEqual(User.objects.get(enrollment_no='E3').username, 'cat')
+
+    def test_blank_and_missing_cells_leave_existing_fields_alone(self):
+        stats, _ = self.run_import(
+            'enrollment_no,username,email,role,department,phone\n'
+            'E1,,,,Maths\n'
+        )
+
+        self.assertEqual(stats['updated'], 1)
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.username, self.existing.email, self.existing.role, self.existing.department, self.existing.phone),
+            ('ann', 'ann@example.com', 'faculty', 'Maths', '555'),
+        )
+        self.assertTrue(self.existing.check_password('old'))
+
+    def test_username_owned_by_another_student_is_skipped(self):
+        stats, errors = self.run_import(
+            'enrollment_no,username\n'
+            'E9,ann\n'
+            'E1,ann\n'
+            ',dan\n'
+        )
+
+        self.assertEqual((stats['skipped'], stats['unchanged']), (2, 1))
+        self.assertCountEqual(errors, [(2, 'username "ann" already belongs to another user'), (4, 'enrollment_no is required')])
+        self.assertFalse(User.objects.filter(enrollment_no='E9').exists())
+
+    def test_passwords_are_reset_only_on_request(self):
+        roster = 'enrollment_no,password\nE1,new-secret\n'
+
+        self.assertEqual(self.run_import(roster)[0]['unchanged'], 1)
+        self.existing.refresh_from_db()
+        self.assertTrue(self.existing.check_password('old'))
+
+        self.assertEqual(self.run_import(roster, reset_passwords=True)[0]['updated'], 1)
+        self.existing.refresh_from_db()
+        self.assertTrue(self.existing.check_password('new-secret'))
+
+    def test_uploads_wait_for_the_queue_worker(self):
+        job = queue_import('enrollment_no,username\nE5,eve\n', 'roster.csv')
+        self.assertEqual((job.status, job.total_rows), ('queued', 1))
+        self.assertFalse(User.objects.filter(enrollment_no='E5').exists())
+
+        call_command('provision_users', '--queued', '--processes=1', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.stats['created']), ('done', 1))
+        self.assertTrue(User.objects.filter(username='eve').exists())
+
+    def test_a_queued_job_is_claimed_once(self):
+        job = queue_import('enrollment_no\nE5\n', 'roster.csv')
+        self.assertEqual(claim_next_job(), job)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(RosterImport.objects.get(pk=job.pk).status, 'running')
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.snapshot = Snapshot(1, [(3, 'cat', 'E3'), (1, 'ann', 'E1'), (2, 'Annie', None)], search_columns=[0, 1])
+
+    def test_row_by_primary_key(self):
+        self.assertEqual(self.snapshot.row(1), (1, 'ann', 'E1'))
+        self.assertEqual(self.snapshot.row(2), (2, 'Annie', None))
+        self.assertIsNone(self.snapshot.row(4))
+
+    def test_search_is_case_insensitive_and_limited(self):
+        self.assertEqual([row[0] for row in self.snapshot.search('ANN')], [1, 2])
+        self.assertEqual([row[0] for row in self.snapshot.search('e3')], [3])
+        self.assertEqual(len(self.snapshot.search('', limit=2)), 2)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class LookupCacheTests(TestCase):
+    def setUp(self):
+        lookups.students.invalidate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student = User.objects.create_user('ann', password='x', role='student', enrollment_no='E1', department='CS')
+
+    def test_edits_reload_the_snapshot(self):
+        self.assertEqual(lookups.students.label_for(self.student.pk), 'ann (E1) - CS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.department = 'EE'
+            self.student.save()
+
+        self.assertEqual(lookups.students.label_for(self.student.pk), 'ann (E1) - EE')
+        self.assertEqual(lookups.students.search('e1'), [{'id': self.student.pk, 'text': 'ann (E1) - EE'}])
+
+    def test_logins_keep_the_snapshot(self):
+        snapshot = lookups.students.snapshot()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.last_login = timezone.now()
+            self.student.save(update_fields=['last_login'])
+
+        self.assertIs(lookups.students.snapshot(), snapshot)
+
+    def test_version_bumped_by_another_worker_reloads(self):
+        snapshot = lookups.students.snapshot()
+        User.objects.filter(pk=self.student.pk).update(username='anna')
+        self.assertIs(lookups.students.snapshot(), snapshot)
+
+        lookups.cache.incr(lookups.students.version_key)
+
+        self.assertEqual(lookups.students.snapshot().row(self.student.pk)[1], 'anna')
+
+    def test_unknown_or_malformed_ids_have_no_label(self):
+        self.assertEqual(lookups.students.label_for('x'), '')
+        self.assertEqual(lookups.students.label_for(self.student.pk + 100), '')
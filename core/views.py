@@ -3,10 +3,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg, Count
+from django.core.paginator import Paginator
+from django.db.models import Q, Avg, Count, Max, Exists, OuterRef
+from django.db import connection, DatabaseError
+from django.http import HttpResponse, Http404, JsonResponse
+from django.urls import reverse
 from django.utils import timezone
-from .models import User, Event, SessionalMark, Notification
-from .forms import UserRegisterForm, EventForm, MarkEntryForm, NotificationForm, SearchForm
+from datetime import date, timedelta
+from .models import User, Event, SessionalMark, Notification, RankSnapshot, RosterImport
+from .forms import UserRegisterForm, EventForm, MarkEntryForm, NotificationForm, SearchForm, RosterUploadForm
+from .scheduling import month_window, week_window, events_by_day
+from .notifications import schedule_fan_out, delivery_progress
+from .lookups import LOOKUPS
 
 # Home Page
 def home(request):
@@ -14,6 +22,14 @@ def home(request):
         return redirect('dashboard')
     return render(request, 'home.html')
 
+# Load balancer / process manager probe
+def health(request):
+    try:
+        connection.ensure_connection()
+    except DatabaseError:
+        return JsonResponse({'status': 'error', 'database': 'unavailable'}, status=503)
+    return JsonResponse({'status': 'ok'})
+
 # Authentication Views
 def register(request):
     if request.method == 'POST':
@@ -49,6 +65,40 @@ def user_logout(request):
     return redirect('login')
 
 # Dashboard Views
+def _event_progress(events):
+    """Attach mark progress to a page of events, in three grouped queries.
+
+    Only marks from an event's audience count: its assigned students, or
+    every student when nobody is assigned.
+    """
+    events = list(events)
+    event_ids = [event.pk for event in events]
+    Assignment = Event.assigned_students.through
+    assigned = dict(
+        Assignment.objects.filter(event_id__in=event_ids).order_by()
+        .values_list('event').annotate(c=Count('*'))
+    )
+    in_audience = Exists(Assignment.objects.filter(event=OuterRef('event'), user=OuterRef('student'))) | (
+        ~Exists(Assignment.objects.filter(event=OuterRef('event'))) & Q(student__role='student')
+    )
+    marks = {
+        row['event']: row
+        for row in SessionalMark.objects.filter(in_audience, event_id__in=event_ids).order_by()
+        .values('event').annotate(entered=Count('pk'), avg=Avg('marks_obtained'), top=Max('marks_obtained'))
+    }
+    students = User.objects.filter(role='student').count() if len(assigned) < len(events) else 0
+
+    for event in events:
+        stats = marks.get(event.pk, {})
+        event.assigned_count = assigned.get(event.pk, 0)
+        # Events without assigned students are open to every student
+        event.audience = event.assigned_count or students
+        event.marks_entered = stats.get('entered', 0)
+        event.avg_marks = stats.get('avg')
+        event.top_marks = stats.get('top')
+        event.pending_count = max(event.audience - event.marks_entered, 0)
+    return events
+
 @login_required
 def dashboard(request):
     user = request.user
@@ -57,8 +107,11 @@ def dashboard(request):
     if user.role == 'student':
         marks = SessionalMark.objects.filter(student=user).select_related('event')
         upcoming_events = Event.objects.filter(date__gte=timezone.now().date())[:5]
+        # Precomputed by core.ranking; one indexed read on (student, event_type)
+        ranks = RankSnapshot.objects.filter(student=user).order_by('event_type')
         context = {
             'marks': marks,
+            'ranks': ranks,
             'upcoming_events': upcoming_events,
             'notifications': notifications,
             'total_events': marks.count(),
@@ -66,11 +119,13 @@ def dashboard(request):
         return render(request, 'student_dashboard.html', context)
     
     elif user.role == 'faculty':
-        events = Event.objects.filter(created_by=user)
+        events = Event.objects.filter(created_by=user).order_by('-date', '-pk')
+        events = Paginator(events, 10).get_page(request.GET.get('page'))
+        events.object_list = _event_progress(events.object_list)
         total_marks_entered = SessionalMark.objects.filter(entered_by=user).count()
         context = {
             'events': events,
-            'total_events': events.count(),
+            'total_events': events.paginator.count,
             'total_marks_entered': total_marks_entered,
             'notifications': notifications,
         }
@@ -92,6 +147,21 @@ def dashboard(request):
         }
         return render(request, 'admin_dashboard.html', context)
 
+@login_required
+def transcript(request):
+    if request.user.role != 'student':
+        messages.error(request, 'Transcripts are only available to students')
+        return redirect('dashboard')
+    current = SessionalMark.objects.filter(student=request.user).select_related('event').order_by('-event__date')
+    from .archive import archived_marks  # student transcript only, kept out of worker startup
+    try:
+        # Past terms live in the archive database
+        archived = list(archived_marks(request.user).order_by('-event__date'))
+    except DatabaseError:
+        archived = []
+    context = {'current_marks': current, 'archived_marks': archived}
+    return render(request, 'transcript.html', context)
+
 # Event Management
 @login_required
 def event_list(request):
@@ -128,6 +198,7 @@ def event_create(request):
             event = form.save(commit=False)
             event.created_by = request.user
             event.save()
+            form.save_m2m()
             messages.success(request, 'Event created successfully!')
             return redirect('event_list')
     else:
@@ -164,6 +235,81 @@ def event_delete(request, pk):
     messages.success(request, 'Event deleted successfully!')
     return redirect('dashboard')
 
+# Calendar
+def _visible_events(user):
+    events = Event.objects.all()
+    if user.role == 'student':
+        # Unassigned events are open to every student
+        events = events.filter(Q(assigned_students=user) | Q(assigned_students__isnull=True)).distinct()
+    return events
+
+@login_required
+def calendar_month(request, year=None, month=None):
+    today = timezone.localdate()
+    year, month = year or today.year, month or today.month
+    if not 1 <= month <= 12:
+        raise Http404('Invalid month')
+    # Keep one year of headroom for the padded grid and prev/next links
+    if not date.min.year < year < date.max.year:
+        raise Http404('Invalid year')
+    weeks, first_day, last_day = month_window(year, month)
+    events = _visible_events(request.user).filter(date__range=(first_day, last_day)).order_by('date', 'time')
+    days = events_by_day(events)
+    first_of_month = date(year, month, 1)
+    prev_month = first_of_month - timedelta(days=1)
+    next_month = first_of_month + timedelta(days=32)
+    context = {
+        'mode': 'month',
+        'title': first_of_month.strftime('%B %Y'),
+        'weeks': [
+            (reverse('calendar_week', args=week[0].isocalendar()[:2]), [(day, days.get(day, [])) for day in week])
+            for week in weeks
+        ],
+        'month': month,
+        'today': today,
+        'prev_url': reverse('calendar_month', args=[prev_month.year, prev_month.month]),
+        'next_url': reverse('calendar_month', args=[next_month.year, next_month.month]),
+    }
+    return render(request, 'calendar.html', context)
+
+@login_required
+def calendar_week(request, year, week):
+    if not date.min.year < year < date.max.year:
+        raise Http404('Invalid year')
+    try:
+        days, first_day, last_day = week_window(year, week)
+    except ValueError:
+        raise Http404('Invalid week')
+    events = _visible_events(request.user).filter(date__range=(first_day, last_day)).order_by('date', 'time')
+    by_day = events_by_day(events)
+    prev_week = (first_day - timedelta(days=7)).isocalendar()
+    next_week = (first_day + timedelta(days=7)).isocalendar()
+    context = {
+        'mode': 'week',
+        'title': f'Week of {first_day:%b %d, %Y}',
+        'weeks': [(None, [(day, by_day.get(day, [])) for day in days])],
+        'month': None,
+        'today': timezone.localdate(),
+        'prev_url': reverse('calendar_week', args=prev_week[:2]),
+        'next_url': reverse('calendar_week', args=next_week[:2]),
+    }
+    return render(request, 'calendar.html', context)
+
+@login_required
+def calendar_feed(request):
+    if request.user.role != 'student':
+        messages.error(request, 'Calendar feeds are only available to students')
+        return redirect('dashboard')
+    from .ical import build_ical  # export-only, kept out of worker startup
+    
+    events = _visible_events(request.user).only(
+        'title', 'event_type', 'date', 'time', 'duration_minutes', 'venue', 'description', 'updated_at'
+    )
+    body = build_ical(events, request.get_host(), name=f'{request.user.username} - Sessional System')
+    response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="sessional.ics"'
+    return response
+
 # Marks Management
 @login_required
 def mark_entry(request):
@@ -182,9 +328,20 @@ def mark_entry(request):
     else:
         form = MarkEntryForm()
     
-    recent_marks = SessionalMark.objects.filter(entered_by=request.user)[:10]
+    recent_marks = SessionalMark.objects.filter(entered_by=request.user).select_related('student', 'event')[:10]
     return render(request, 'mark_entry.html', {'form': form, 'recent_marks': recent_marks})
 
+@login_required
+def mark_lookup(request, kind):
+    if request.user.role not in ['faculty', 'admin']:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    lookup = LOOKUPS.get(kind)
+    if lookup is None:
+        raise Http404
+    query = request.GET.get('q', '').strip()
+    results = lookup.search(query) if query else []
+    return JsonResponse({'results': results})
+
 # Notifications
 @login_required
 def notifications_view(request):
@@ -211,22 +368,24 @@ def notification_create(request):
                     return render(request, 'notification_form.html', {'form': form})
             
             notification.save()
-            messages.success(request, 'Notification created successfully!')
+            schedule_fan_out(notification)
+            messages.success(request, 'Notification created successfully! Delivery to recipients continues in the background.')
             return redirect('dashboard')
     else:
-        form = NotificationForm()
-        
-        # If faculty, limit their choices to student/all only
-        if request.user.role == 'faculty':
-            form.fields['target_role'].choices = [
-                ('all', 'All Users'),
-                ('student', 'Students Only'),
-            ]
+        # Faculty only get the student/all choices
+        form = NotificationForm(user=request.user)
     
     return render(request, 'notification_form.html', {'form': form})
 
  
 
+@login_required
+def notification_progress(request, pk):
+    notification = get_object_or_404(Notification, pk=pk)
+    if request.user.role != 'admin' and notification.created_by != request.user:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    return JsonResponse(delivery_progress(notification))
+
 @login_required
 def request_reval(request):
     if request.method == 'POST' and request.user.role == 'student':
@@ -250,19 +409,54 @@ def edit_user(request, pk):
     
     if request.method == "POST":
         # Manually update user fields (don't use UserCreationForm for editing)
-        user.username = request.POST.get('username')
-        user.email = request.POST.get('email')
-        user.role = request.POST.get('role')
-        user.department = request.POST.get('department', '')
-        user.phone = request.POST.get('phone', '')
-        user.enrollment_no = request.POST.get('enrollment_no', '')
-        user.save()
+        values = {
+            'username': request.POST.get('username'),
+            'email': request.POST.get('email'),
+            'role': request.POST.get('role'),
+            'department': request.POST.get('department', ''),
+            'phone': request.POST.get('phone', ''),
+            'enrollment_no': request.POST.get('enrollment_no', ''),
+        }
+        # Only write the columns that actually changed
+        changed = [field for field, value in values.items() if (getattr(user, field) or '') != (value or '')]
+        for field in changed:
+            setattr(user, field, values[field])
+        if changed:
+            user.save(update_fields=changed)
         messages.success(request, "User details updated successfully.")
         return redirect('dashboard')
     
     return render(request, 'edit_user.html', {'user': user})
 
 
+@login_required
+def provision_users(request):
+    if request.user.role != 'admin':
+        messages.error(request, 'Unauthorized')
+        return redirect('dashboard')
+    
+    if request.method == 'POST':
+        form = RosterUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            from .provisioning import queue_import  # admin-only, kept out of worker startup
+            roster = form.cleaned_data['roster']
+            job = queue_import(roster.text, roster.name, request.user, form.cleaned_data['reset_passwords'])
+            messages.success(request, f'Roster "{job.file_name}" queued for import.')
+            return redirect('provision_status', pk=job.pk)
+    else:
+        form = RosterUploadForm()
+    recent_imports = RosterImport.objects.defer('roster')[:10]
+    return render(request, 'provision_users.html', {'form': form, 'recent_imports': recent_imports})
+
+@login_required
+def provision_status(request, pk):
+    if request.user.role != 'admin':
+        messages.error(request, 'Unauthorized')
+        return redirect('dashboard')
+    job = get_object_or_404(RosterImport.objects.defer('roster'), pk=pk)
+    return render(request, 'provision_status.html', {'job': job})
+
+
 @login_required
 def delete_user(request, pk):
     if request.user.role != 'admin':
@@ -1,21 +1,26 @@
 # settings.py
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-SECRET_KEY = 'your-secret-key-here'
+# Development defaults; production sets these through the environment
+# (`manage.py serve` refuses to start with DEBUG on or no ALLOWED_HOSTS)
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'your-secret-key-here')
 
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()]
 
 # ADD THIS LINE (Critical!)
 AUTH_USER_MODEL = 'core.User'
 
 # Application definition
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # SimpleAdminConfig skips autodiscovery during django.setup(); admin
+    # modules are imported when the URLconf loads (see urls.py)
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -26,6 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,9 +64,29 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Past terms moved out by `manage.py archive_terms`
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'archive.sqlite3',
+    },
 }
 
+# Read replica (core/routers.py). Without one, as locally, every read goes
+# to default; set DJANGO_REPLICA_DB_NAME to the replica's database in
+# production.
+if os.environ.get('DJANGO_REPLICA_DB_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DJANGO_REPLICA_DB_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# How long a client keeps reading from the primary after it writes
+REPLICA_STICKY_SECONDS = 15
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -76,3 +102,35 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Notification fan-out (core/notifications.py). Email goes through
+# EMAIL_BACKEND; for local work set
+# DJANGO_NOTIFICATION_BACKEND=core.notifications.FileBackend to append
+# messages to NOTIFICATION_FILE_PATH instead.
+NOTIFICATION_BACKEND = os.environ.get('DJANGO_NOTIFICATION_BACKEND', 'core.notifications.MailBackend')
+NOTIFICATION_FILE_PATH = BASE_DIR / 'sent_notifications.jsonl'
+NOTIFICATION_WORKERS = 8
+NOTIFICATION_MAX_ATTEMPTS = 3
+
+# Rank snapshots (core/ranking.py) are rebuilt in the background, at most
+# once per department per this many seconds
+RANK_REFRESH_DELAY_SECONDS = 2
+
+# Roster uploads from the web UI are queued and imported by
+# `manage.py provision_users --queued`, which should run from cron (e.g. every
+# minute) or a supervised worker; see core/provisioning.py
+ROSTER_UPLOAD_MAX_BYTES = 2 * 1024 * 1024
+
+# Worker cold-start budget in milliseconds, enforced in CI by
+# `python manage.py startup_profile --check`; first_request is a GET of the
+# rendered /login/ page (sessions, auth, messages and templates)
+STARTUP_BUDGET_MS = {
+    'setup': 500,
+    'first_request': 150,
+}
+
+# Mark entry lookups (core/lookups.py) keep students and events in memory per
+# worker. Edits bump a version in the default cache; with the per-process
+# LocMemCache other workers only see them after this many seconds, so point
+# CACHES at a shared backend when running several workers.
+LOOKUP_CACHE_TTL = 300
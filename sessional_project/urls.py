@@ -3,8 +3,12 @@ from django.contrib import admin
 from django.urls import path
 from core import views
 
+# Registers core/admin.py; deferred from startup by SimpleAdminConfig
+admin.autodiscover()
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('health/', views.health, name='health'),
     
     # Authentication
     path('', views.home, name='home'),
@@ -22,17 +26,28 @@ urlpatterns = [
     path('events/<int:pk>/edit/', views.event_edit, name='event_edit'),
     path('events/<int:pk>/delete/', views.event_delete, name='event_delete'),
     
+    # Calendar
+    path('calendar/', views.calendar_month, name='calendar'),
+    path('calendar/<int:year>/<int:month>/', views.calendar_month, name='calendar_month'),
+    path('calendar/<int:year>/week/<int:week>/', views.calendar_week, name='calendar_week'),
+    path('calendar/feed.ics', views.calendar_feed, name='calendar_feed'),
+    
     # Marks
     path('marks/entry/', views.mark_entry, name='mark_entry'),
+    path('marks/lookup/<str:kind>/', views.mark_lookup, name='mark_lookup'),
     
     # Notifications
     path('notifications/', views.notifications_view, name='notifications'),
     path('notifications/create/', views.notification_create, name='notification_create'),
+    path('notifications/<int:pk>/progress/', views.notification_progress, name='notification_progress'),
     
     # Student requests
+    path('transcript/', views.transcript, name='transcript'),
     path('request_reval/', views.request_reval, name='request_reval'),
     
     # Admin user management
     path('edit_user/<int:pk>/', views.edit_user, name='edit_user'),
+    path('users/provision/', views.provision_users, name='provision_users'),
+    path('users/provision/<int:pk>/', views.provision_status, name='provision_status'),
     path('delete_user/<int:pk>/', views.delete_user, name='delete_user'),
 ]